@@ -5,22 +5,18 @@ Contains GUI components and style definitions.
 
 from .create_button import ButtonFrame
 from .styles import (
-    RADIO_BUTTON_STYLE,
+    GLOBAL_STYLE,
+    RADIO_BUTTONS_STYLE,
     SETTINGS_BUTTON_STYLE,
     RUN_BUTTON_STYLE,
-    GROUP_BOX_STYLE,
-    WAFER_BUTTON_DEFAULT_STYLE,
-    WAFER_BUTTON_EXISTING_STYLE,
-    WAFER_BUTTON_MISSING_STYLE
+    GROUP_BOX_STYLE
 )
 
 __all__ = [
     'ButtonFrame',
-    'RADIO_BUTTON_STYLE',
+    'GLOBAL_STYLE',
+    'RADIO_BUTTONS_STYLE',
     'SETTINGS_BUTTON_STYLE',
     'RUN_BUTTON_STYLE',
-    'GROUP_BOX_STYLE',
-    'WAFER_BUTTON_DEFAULT_STYLE',
-    'WAFER_BUTTON_EXISTING_STYLE',
-    'WAFER_BUTTON_MISSING_STYLE'
+    'GROUP_BOX_STYLE'
 ] 
\ No newline at end of file
@@ -4,26 +4,52 @@
 
 import sys
 import os
-import time
 from PyQt5.QtWidgets import QApplication 
 from PyQt5.QtWidgets import (
     QWidget, QButtonGroup, QPushButton, QLabel, QGroupBox, QGridLayout,
-    QFileDialog, QProgressDialog, QRadioButton, QSizePolicy)
+    QFileDialog, QProgressDialog, QRadioButton, QSizePolicy, QMessageBox)
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt 
+from PyQt5.QtCore import (
+    Qt, QObject, QRunnable, QThreadPool, QElapsedTimer, pyqtSignal)
 from semapp.Processing.processing import Process
-from semapp.Layout.styles import (
-    RADIO_BUTTON_STYLE,
-    SETTINGS_BUTTON_STYLE,
-    RUN_BUTTON_STYLE,
-    GROUP_BOX_STYLE,
-    WAFER_BUTTON_DEFAULT_STYLE,
-    WAFER_BUTTON_EXISTING_STYLE,
-    WAFER_BUTTON_MISSING_STYLE,
-    SELECT_BUTTON_STYLE,
-    PATH_LABEL_STYLE,
-)
-from semapp.Layout.settings import SettingsWindow
+from semapp.Layout.settings import SettingsWindow, load_settings_data
+
+# Wafer slot numbers and their folder names / button labels
+WAFER_NUMBERS = range(1, 27)
+_WAFER_NAMES = tuple(str(number) for number in WAFER_NUMBERS)
+
+
+class TaskSignals(QObject):
+    """Signals emitted by a Task, delivered in the GUI thread."""
+    progress = pyqtSignal(str, int)  # Task name, number of tasks already done
+    finished = pyqtSignal(str, float)  # Task name, elapsed time in seconds
+    failed = pyqtSignal(str, str)  # Task name, error message
+
+
+class Task(QRunnable):
+    """Run a processing function in a worker thread of the thread pool."""
+
+    def __init__(self, task_name, task_function, *args, step=0, **kwargs):
+        super().__init__()
+        self.task_name = task_name
+        self.step = step  # Number of tasks run before this one
+        self.task_function = task_function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+
+    def run(self):
+        """Execute the function and report the time taken."""
+        self.signals.progress.emit(self.task_name, self.step)
+        timer = QElapsedTimer()  # Monotonic clock
+        timer.start()
+        try:
+            self.task_function(*self.args, **self.kwargs)
+        except Exception as error:  # pylint: disable=broad-except
+            self.signals.failed.emit(self.task_name, str(error))
+            return
+        self.signals.finished.emit(self.task_name, timer.elapsed() / 1000)
+
 
 class ButtonFrame(QWidget):
     """Class to create the various buttons of the interface"""
@@ -40,6 +66,16 @@ class ButtonFrame(QWidget):
         self.selected_image = None
         self.table_data = None
         self.table_vars = None
+        self.wafer_group = None
+        self.image_group = None
+        self._image_group_box = None  # Group box and grid of the image buttons
+        self._image_layout = None
+        self._subdirs_cache = None  # ((dirname, mtime_ns), subdirs)
+        self.progress_dialog = None
+        self._pending_tasks = None  # Iterator over the tasks left to run
+        self._done_tasks = 0
+        self._current_task = None
+        self._process = None  # Kept between runs on the same folder
 
         self.rename = QRadioButton("Rename")
         self.split_rename = QRadioButton("Split .tif and rename (w/ tag)")
@@ -57,8 +93,34 @@ class ButtonFrame(QWidget):
                              self.split_rename_all, self.clean_all,
                              self.create_folder]
 
+        # Radio buttons select their GLOBAL_STYLE rules by object name
         for radiobutton in tool_radiobuttons:
-            radiobutton.setStyleSheet(RADIO_BUTTON_STYLE)
+            radiobutton.setObjectName("tool")
+
+        # Processing tasks of each function, as (task name, Process method)
+        self.function_tasks = {
+            self.split_rename: [
+                ("Cleaning of folders", "clean"),
+                ("Create folders", "organize_and_rename_files"),
+                ("Split w/ tag", "split_tiff"),
+                ("Rename w/ tag", "rename")],
+            self.split_rename_all: [
+                ("Cleaning of folders", "clean_all"),
+                ("Create folders", "organize_and_rename_files"),
+                ("Split and rename w/ tag", "split_rename_all")],
+            self.rename_all: [
+                ("Rename files w/o tag", "clean_folders_and_files"),
+                ("Create folders", "organize_and_rename_files"),
+                ("Rename files w/o tag", "rename_wo_legend_all")],
+            self.rename: [
+                ("Rename files w/o tag", "clean_folders_and_files"),
+                ("Create folders", "organize_and_rename_files"),
+                ("Rename files w/o tag", "rename_wo_legend")],
+            self.clean: [("Cleaning of folders", "clean")],
+            self.clean_all: [("Cleaning of folders", "clean_all")],
+            self.create_folder: [
+                ("Create folders", "organize_and_rename_files")],
+        }
 
         # Example of adding them to a layout
         self.entries = {}
@@ -66,11 +128,9 @@ class ButtonFrame(QWidget):
         # self.dirname = r"C:\Users\TM273821\Desktop\SEM\Amel"
 
 
-        max_characters = 30  # Set character limit
+        self.display_text = None
         if self.dirname:
-            self.display_text = self.dirname if len(
-                self.dirname) <= max_characters else self.dirname[
-                                                     :max_characters] + '...'
+            self.display_text = self._truncate(self.dirname)
 
         # Get the user's folder path (C:\Users\XXXXX)
         self.user_folder = os.path.expanduser(
@@ -78,7 +138,7 @@ class ButtonFrame(QWidget):
 
         # Define the new folder you want to create
         self.new_folder = os.path.join(self.user_folder, "SEM")
-
+        self.settings_file = os.path.join(self.new_folder, "settings_data.json")
 
         # Create the folder if it doesn't exist
         self.create_directory(self.new_folder)
@@ -89,17 +149,14 @@ class ButtonFrame(QWidget):
 
     def create_directory(self, path):
         """Create the directory if it does not exist."""
-        if not os.path.exists(path):
-            os.makedirs(path)
-            print(f"Directory created: {path}")
-        else:
-            print(f"Directory already exists: {path}")
+        os.makedirs(path, exist_ok=True)
 
     def init_ui(self):
         """Initialize the user interface"""
         # Add widgets to the grid layout provided by the main window
 
-        self.settings_window = SettingsWindow()
+        # The settings window is only built when it is first opened
+        self.settings_window = None
         self.dir_box()
         self.create_wafer()
         self.create_radiobuttons_other()
@@ -109,13 +166,12 @@ class ButtonFrame(QWidget):
         self.add_settings_button()
         self.create_run_button()
         self.update_wafer()
-        self.settings_window.data_updated.connect(self.refresh_radiobuttons)
 
 
     def add_settings_button(self):
         """Add a Settings button that opens a new dialog"""
         settings_button = QPushButton("Settings")
-        settings_button.setStyleSheet(SETTINGS_BUTTON_STYLE)
+        settings_button.setObjectName("settings")
         settings_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         settings_button.clicked.connect(self.open_settings_window)
 
@@ -123,25 +179,21 @@ class ButtonFrame(QWidget):
 
     def open_settings_window(self):
         """Open the settings window"""
+        if self.settings_window is None:
+            self.settings_window = SettingsWindow()
+            self.settings_window.data_updated.connect(self.refresh_radiobuttons)
 
         self.settings_window.exec_()
 
     def dir_box(self):
         """Create a smaller directory selection box"""
 
-        # Create layout for this frame
-        frame_dir = QGroupBox("Directory")
-
-        frame_dir.setStyleSheet(GROUP_BOX_STYLE)
+        # Create the frame and its layout with reduced margins
+        frame_dir, frame_dir_layout = self._make_group("Directory")
 
         # Button for selecting folder
         select_folder_button = QPushButton("Select Parent Folder...")
-        select_folder_button.setStyleSheet(SELECT_BUTTON_STYLE)
-
-        # Create layout for the frame and reduce its margins
-        frame_dir_layout = QGridLayout()
-        frame_dir_layout.setContentsMargins(5, 20, 5, 5)  # Reduced margins
-        frame_dir.setLayout(frame_dir_layout)
+        select_folder_button.setObjectName("select")
 
         # label for folder path
         if self.dirname:
@@ -149,7 +201,7 @@ class ButtonFrame(QWidget):
         else:
             self.folder_path_label = QLabel()
 
-        self.folder_path_label.setStyleSheet(PATH_LABEL_STYLE)
+        self.folder_path_label.setObjectName("path")
 
         # Connect the button to folder selection method
         select_folder_button.clicked.connect(self.on_select_folder_and_update)
@@ -161,6 +213,18 @@ class ButtonFrame(QWidget):
         # Add frame to the main layout with a smaller footprint
         self.layout.addWidget(frame_dir, 0, 0)
 
+    @staticmethod
+    def _make_group(title, margins=(5, 20, 5, 5), spacing=None):
+        """Create a group box with a grid layout and reduced margins.
+
+        The group box style comes from the style sheet of the parent widget."""
+        group_box = QGroupBox(title)
+        group_layout = QGridLayout(group_box)
+        group_layout.setContentsMargins(*margins)
+        if spacing is not None:
+            group_layout.setSpacing(spacing)
+        return group_box, group_layout
+
     def folder_var_changed(self):
         """Update parent folder"""
         return self.dirname
@@ -168,143 +232,181 @@ class ButtonFrame(QWidget):
     def on_select_folder_and_update(self):
         """Method to select folder and update checkbuttons"""
         self.select_folder()
+        self._subdirs_cache = None
         self.update_wafer()
 
+    def list_subdirs(self):
+        """Return the set of subdirectory names of the parent folder.
+
+        The listing is cached and only rescanned when the folder or its
+        modification time changes."""
+        key = (self.dirname, os.stat(self.dirname).st_mtime_ns)
+        if self._subdirs_cache is None or self._subdirs_cache[0] != key:
+            with os.scandir(self.dirname) as entries:
+                subdirs = frozenset(entry.name for entry in entries
+                                    if entry.is_dir())
+            self._subdirs_cache = (key, subdirs)
+        return self._subdirs_cache[1]
+
     def update_wafer(self):
         """Update the appearance of radio buttons based on the existing
         subdirectories in the specified directory."""
         if self.dirname:
             # List the subdirectories in the specified directory
-            subdirs = [d for d in os.listdir(self.dirname) if
-                       os.path.isdir(os.path.join(self.dirname, d))]
+            subdirs = self.list_subdirs()
 
             # Update the style of radio buttons based on the subdirectory presence
-            for number in range(1, 27):
-                radio_button = self.radio_vars.get(number)
-                if radio_button:
-                    if str(number) in subdirs:
-                        radio_button.setStyleSheet(WAFER_BUTTON_EXISTING_STYLE)
-                    else:
-                        radio_button.setStyleSheet(WAFER_BUTTON_MISSING_STYLE)
+            for number, name in zip(WAFER_NUMBERS, _WAFER_NAMES):
+                if name in subdirs:
+                    self._set_wafer_state(number, "existing")
+                else:
+                    self._set_wafer_state(number, "missing")
         else:
             # Default style for all radio buttons if no directory is specified
-            for number in range(1, 27):
-                radio_button = self.radio_vars.get(number)
-                radio_button.setStyleSheet(WAFER_BUTTON_MISSING_STYLE)
+            for number in WAFER_NUMBERS:
+                self._set_wafer_state(number, "missing")
+
+    def _set_wafer_state(self, number, state):
+        """Set the "state" property selecting the style of a wafer button,
+        repolishing the button only when the state changes."""
+        radio_button = self.radio_vars.get(number)
+        if radio_button and radio_button.property("state") != state:
+            radio_button.setProperty("state", state)
+            radio_button.style().unpolish(radio_button)
+            radio_button.style().polish(radio_button)
 
     def create_wafer(self):
         """Create a grid of radio buttons for wafer slots with exclusive selection."""
-        group_box = QGroupBox("Wafer Slots")  # Add a title to the group
-        group_box.setStyleSheet(GROUP_BOX_STYLE)  
+        # Reduce internal margins and spacing between widgets
+        group_box, wafer_layout = self._make_group(
+            "Wafer Slots", margins=(2, 20, 2, 2), spacing=5)
 
-        wafer_layout = QGridLayout()
-        wafer_layout.setContentsMargins(2, 20, 2, 2)  # Reduce internal margins
-        wafer_layout.setSpacing(5)  # Reduce spacing between widgets
+        # Exclusive group, the id of each button is its wafer number
+        self.wafer_group = QButtonGroup(self)
+        self.wafer_group.setExclusive(True)
 
-        
+        # Defer the repaint of the box until all the buttons are added
+        group_box.setUpdatesEnabled(False)
 
         # Add radio buttons from 1 to 24, with 12 buttons per row
-        for number in range(1, 27):
-            radio_button = QRadioButton(str(number))
-            radio_button.setStyleSheet(WAFER_BUTTON_DEFAULT_STYLE)
-
-            # Connect the radio button to a handler for exclusive selection
-            radio_button.toggled.connect(self.get_selected_option)
+        for number, name in zip(WAFER_NUMBERS, _WAFER_NAMES):
+            radio_button = QRadioButton(name)
+            radio_button.setObjectName("wafer")
             self.radio_vars[number] = radio_button
 
+            self.wafer_group.addButton(radio_button, number)
+
             # Calculate the row and column for each radio button in the layout
             row = (number - 1) // 13  # Row starts at 0
             col = (number - 1) % 13  # Column ranges from 0 to 12
 
             wafer_layout.addWidget(radio_button, row, col)
 
-        group_box.setLayout(wafer_layout)
+        group_box.setUpdatesEnabled(True)
 
         # Add the QGroupBox to the main layout
         self.layout.addWidget(group_box, 1, 0, 1, 4)
 
     def get_selected_option(self):
-        """Ensure only one radio button is selected at a time and track the selected button."""
-        selected_number = None  # Variable to store the selected radio button number
-
-        # Iterate over all radio buttons
-        for number, radio_button in self.radio_vars.items():
-            if radio_button.isChecked():
-                selected_number = number  # Track the currently selected radio button
-
-        if selected_number is not None:
-            self.selected_option = selected_number  # Store the selected option for further use
-            return self.selected_option
+        """Return the selected wafer number, or None if no wafer is selected."""
+        number = self.wafer_group.checkedId()
+        self.selected_option = number if number != -1 else None
+        return self.selected_option
 
     def image_radiobuttons(self):
         """Create a grid of radio buttons for wafer slots with exclusive selection."""
-        self.table_data = self.settings_window.get_table_data()
-        print(self.table_data)
+        self.table_data = load_settings_data(self.settings_file)
         number = len(self.table_data)
 
-        group_box = QGroupBox("Image type")  # Add a title to the group
-        group_box.setStyleSheet(GROUP_BOX_STYLE)  # Style the title
+        # Reduce internal margins and spacing between widgets
+        group_box, wafer_layout = self._make_group(
+            "Image type", margins=(2, 20, 2, 2), spacing=5)
 
-        wafer_layout = QGridLayout()
-        wafer_layout.setContentsMargins(2, 20, 2, 2)  # Reduce internal margins
-        wafer_layout.setSpacing(5)  # Reduce spacing between widgets
+        # Keep the box and its layout so that refreshes can update them
+        self._image_group_box = group_box
+        self._image_layout = wafer_layout
 
         self.table_vars = {}  # Store references to radio buttons
 
-        # Add radio buttons from 1 to 24, with 12 radio buttons per row
+        # Exclusive group, the id of each button is its settings row
+        self.image_group = QButtonGroup(self)
+        self.image_group.setExclusive(True)
+
+        # Add radio buttons with 3 radio buttons per row
+        group_box.setUpdatesEnabled(False)
         for i in range(number):
-            label = str(self.table_data[i]["Scale"]) + " - " + str(
-                self.table_data[i]["Image Type"])
-            radio_button = QRadioButton(label)
-            radio_button.setStyleSheet(WAFER_BUTTON_DEFAULT_STYLE)
+            self._add_image_button(i, self.table_data[i])
+        group_box.setUpdatesEnabled(True)
 
-            # Connect the radio button to a handler for exclusive selection
-            radio_button.toggled.connect(self.get_selected_image)
-            self.table_vars[i] = radio_button
+        # Add the QGroupBox to the main layout
+        self.layout.addWidget(group_box, 1, 4, 1, 1)
 
-            # Calculate the row and column for each radio button in the layout
-            row = (i) // 3  # Row starts at 1 after the label
-            col = (i) % 3  # Column ranges from 0 to 11
+    @staticmethod
+    def _image_label(row_data):
+        """Build the radio button label of a settings row."""
+        return str(row_data["Scale"]) + " - " + str(row_data["Image Type"])
 
-            wafer_layout.addWidget(radio_button, row, col)
+    def _add_image_button(self, i, row_data):
+        """Create the radio button of the settings row i."""
+        radio_button = QRadioButton(self._image_label(row_data))
+        radio_button.setObjectName("image")
 
-        group_box.setLayout(wafer_layout)
+        self.image_group.addButton(radio_button, i)
+        self.table_vars[i] = radio_button
 
-        # Add the QGroupBox to the main layout
-        self.layout.addWidget(group_box, 1, 4, 1, 1)
+        # Calculate the row and column for each radio button in the layout
+        row = i // 3  # Row starts at 0
+        col = i % 3  # Column ranges from 0 to 2
+
+        self._image_layout.addWidget(radio_button, row, col)
 
     def refresh_radiobuttons(self):
-        """Recreates the radio buttons after updating the data in Settings."""
-        self.image_radiobuttons()  # Call your method to recreate the radio buttons
+        """Update the image type radio buttons after the data changed in
+        Settings, only touching the rows that were added, removed or edited."""
+        # Copy the rows saved by the settings window, which keeps editing them
+        new_data = [dict(row_data) for row_data in self.settings_window.data]
+
+        # Repaint the box once after all the changes
+        self._image_group_box.setUpdatesEnabled(False)
+
+        # Relabel the rows that are kept
+        for i in range(min(len(new_data), len(self.table_vars))):
+            label = self._image_label(new_data[i])
+            if self.table_vars[i].text() != label:
+                self.table_vars[i].setText(label)
+
+        # Create the new rows
+        for i in range(len(self.table_vars), len(new_data)):
+            self._add_image_button(i, new_data[i])
+
+        # Delete the removed rows
+        for i in range(len(new_data), len(self.table_vars)):
+            radio_button = self.table_vars.pop(i)
+            self.image_group.removeButton(radio_button)
+            self._image_layout.removeWidget(radio_button)
+            radio_button.deleteLater()
+
+        self._image_group_box.setUpdatesEnabled(True)
+        self.table_data = new_data
 
     def get_selected_image(self):
-        """Track the selected radio button."""
-        selected_number = None  # Variable to store the selected radio button number
-        n_types= len(self.table_vars.items())
-        # Iterate over all radio buttons
-        for number, radio_button in self.table_vars.items():
-
-            if radio_button.isChecked():
-                selected_number = number  # Track the currently selected radio button
-
-        if selected_number is not None:
-            self.selected_image = selected_number  # Store the selected option for further use
-            return self.selected_image, n_types
+        """Return the selected image index and the number of image types,
+        or None if no image type is selected."""
+        index = self.image_group.checkedId()
+        if index != -1:
+            self.selected_image = index
+            return self.selected_image, len(self.table_vars)
 
     def create_radiobuttons(self):
         """Create radio buttons for tools and a settings button."""
 
         # Create a QGroupBox for "Functions (Wafer)"
-        frame = QGroupBox("Functions (Wafer)")
-        frame.setStyleSheet(GROUP_BOX_STYLE)
-
-        frame_layout = QGridLayout(frame)
+        frame, frame_layout = self._make_group("Functions (Wafer)")
 
         # Add radio buttons to the frame layout
         frame_layout.addWidget(self.split_rename, 0, 0)
         frame_layout.addWidget(self.rename, 1, 0)
         frame_layout.addWidget(self.clean, 2, 0)
-        frame_layout.setContentsMargins(5, 20, 5, 5)
         # Add the frame to the main layout
         self.layout.addWidget(frame, 0, 2)  # Add frame to main layout
 
@@ -317,17 +419,13 @@ class ButtonFrame(QWidget):
         """Create radio buttons for tools and a settings button."""
 
         # Create a QGroupBox for "Functions (Lot)"
-        frame = QGroupBox("Functions (Lot)")
-        frame.setStyleSheet(GROUP_BOX_STYLE)
-
-        frame_layout = QGridLayout(frame)
+        frame, frame_layout = self._make_group("Functions (Lot)")
 
         # Add radio buttons to the frame layout
         frame_layout.addWidget(self.split_rename_all, 0, 0)
         frame_layout.addWidget(self.rename_all, 1, 0)
         frame_layout.addWidget(self.clean_all, 2, 0)
 
-        frame_layout.setContentsMargins(5, 20, 5, 5)
         # Add the frame to the main layout
         self.layout.addWidget(frame, 0, 3)  # Add frame to main layout
 
@@ -341,14 +439,10 @@ class ButtonFrame(QWidget):
         """Create radio buttons for tools and a settings button."""
 
         # Create a QGroupBox for "Functions (Other)"
-        frame = QGroupBox("Functions (Other)")
-        frame.setStyleSheet(GROUP_BOX_STYLE)
-
-        frame_layout = QGridLayout(frame)
+        frame, frame_layout = self._make_group("Functions (Other)")
 
         # Add radio buttons to the frame layout
         frame_layout.addWidget(self.create_folder, 0, 0)
-        frame_layout.setContentsMargins(5, 20, 5, 5)
 
         # Add the frame to the main layout
         self.layout.addWidget(frame, 0, 1)  # Add frame to main layout
@@ -362,20 +456,22 @@ class ButtonFrame(QWidget):
 
         if folder:
             self.dirname = folder
-            max_characters = 20  # Set character limit
+            self.display_text = self._truncate(self.dirname)
+            self.folder_path_label.setText(self.display_text)
 
-            # Truncate text if it exceeds the limit
-            display_text = self.dirname if len(
-                self.dirname) <= max_characters else self.dirname[
-                                                     :max_characters] + '...'
-            self.folder_path_label.setText(display_text)
+    @staticmethod
+    def _truncate(text, max_characters=20):
+        """Truncate text if it exceeds the character limit."""
+        if len(text) <= max_characters:
+            return text
+        return text[:max_characters] + '...'
 
     def create_run_button(self):
         """Create a button to run data processing"""
 
         # Create the QPushButton
         run_button = QPushButton("Run function")
-        run_button.setStyleSheet(RUN_BUTTON_STYLE)
+        run_button.setObjectName("run")
         run_button.setFixedWidth(150)
         run_button.clicked.connect(self.run_data_processing)
 
@@ -385,38 +481,29 @@ class ButtonFrame(QWidget):
     def run_data_processing(self):
         """Handles photoluminescence data processing and updates progress."""
 
-        scale_data = self.new_folder + os.sep + "settings_data.json"
-        wafer_number= self.get_selected_option()
-
+        wafer_number = self.get_selected_option()
 
-        if not self.dirname or not any([self.rename.isChecked()
-                                        or not self.clean.isChecked()
-                                        or not self.split_rename.isChecked()
-                                        or not self.rename_all.isChecked()
-                                        or not self.clean_all.isChecked()
-                                        or not self.split_rename_all.isChecked()
-                                        ]):
+        checked_button = self.button_group.checkedButton()
+        if not self.dirname or checked_button is None:
             return
 
-        # Initialize processing classes
-        sem_class = Process(self.dirname, wafer=wafer_number, scale = scale_data)
-        total_steps = 0
-        if self.split_rename.isChecked():
-            total_steps = 3
-        if self.rename.isChecked():
-            total_steps = 1
-        if self.clean.isChecked():
-            total_steps = 1
-
-        if self.split_rename_all.isChecked():
-            total_steps = 3
-        if self.rename_all.isChecked():
-            total_steps = 1
-        if self.clean_all.isChecked():
-            total_steps = 1
-        if self.create_folder.isChecked():
-            total_steps = 1
+        # One processing instance per folder, so that its parsed recipes are
+        # reused by the next runs. The settings are the ones kept in memory,
+        # the settings file is only read at startup
+        sem_class = self._process
+        if sem_class is None or sem_class.dirname != self.dirname:
+            sem_class = Process(self.dirname, wafer=wafer_number,
+                                scale=self.settings_file,
+                                settings=self.table_data)
+            self._process = sem_class
+        else:
+            sem_class.wafer_number = str(wafer_number)
+            sem_class.settings = self.table_data
 
+        # Tasks to run one after the other, as (task name, function)
+        tasks = [(task_name, getattr(sem_class, method_name))
+                 for task_name, method_name in self.function_tasks[checked_button]]
+        total_steps = len(tasks)
 
         progress_dialog = QProgressDialog("Data processing in progress...",
                                           "Cancel", 0, total_steps, self)
@@ -435,58 +522,56 @@ class ButtonFrame(QWidget):
 
         progress_dialog.show()
 
-        QApplication.processEvents()
-
-        def execute_with_timer(task_name, task_function, *args, **kwargs):
-            """Executes a task and displays the time taken."""
-            start_time = time.time()
-            progress_dialog.setLabelText(task_name)
-            QApplication.processEvents()  # Ensures the interface is updated
-            task_function(*args, **kwargs)
-            elapsed_time = time.time() - start_time
-            print(f"{task_name} completed in {elapsed_time:.2f} seconds.")
-
-        if self.split_rename.isChecked():
-            execute_with_timer("Cleaning of folders", sem_class.clean)
-            execute_with_timer("Create folders",
-                               sem_class.organize_and_rename_files)
-
-            execute_with_timer("Split w/ tag", sem_class.split_tiff)
-            execute_with_timer("Rename w/ tag", sem_class.rename)
-            self.update_wafer()
-
-        if self.split_rename_all.isChecked():
-            execute_with_timer("Cleaning of folders", sem_class.clean_all)
-            execute_with_timer("Create folders",
-                               sem_class.organize_and_rename_files)
-
-            execute_with_timer("Split w/ tag", sem_class.split_tiff_all)
-            execute_with_timer("Rename w/ tag", sem_class.rename_all)
-            self.update_wafer()
-
-        if self.rename_all.isChecked():
-            execute_with_timer("Rename files w/o tag", sem_class.clean_folders_and_files)
-            execute_with_timer("Create folders", sem_class.organize_and_rename_files)
-            self.update_wafer()
-            execute_with_timer("Rename files w/o tag", sem_class.rename_wo_legend_all)
-
-        if self.rename.isChecked():
-            execute_with_timer("Rename files w/o tag", sem_class.clean_folders_and_files)
-            execute_with_timer("Create folders", sem_class.organize_and_rename_files)
-            self.update_wafer()
-            execute_with_timer("Rename files w/o tag", sem_class.rename_wo_legend)
-
-        if self.clean.isChecked():
-            execute_with_timer("Cleaning of folders", sem_class.clean)
-
-        if self.clean_all.isChecked():
-            execute_with_timer("Cleaning of folders", sem_class.clean_all)
-
-        if self.create_folder.isChecked():
-            execute_with_timer("Create folders", sem_class.organize_and_rename_files)
-            self.update_wafer()
-
-        progress_dialog.close()
+        self.progress_dialog = progress_dialog
+        self._pending_tasks = iter(tasks)
+        self._done_tasks = 0
+        self._run_next_task()
+
+    def _run_next_task(self):
+        """Start the next processing task in the thread pool, or finish the
+        processing when no task is left."""
+        task_info = next(self._pending_tasks, None)
+        if task_info is None:
+            self._finish_processing()
+            return
+
+        task_name, task_function = task_info
+
+        # Keep a reference to the task so its signals outlive the worker
+        self._current_task = Task(task_name, task_function,
+                                  step=self._done_tasks)
+        self._current_task.signals.progress.connect(self._on_task_progress)
+        self._current_task.signals.finished.connect(self._on_task_finished)
+        self._current_task.signals.failed.connect(self._on_task_failed)
+        QThreadPool.globalInstance().start(self._current_task)
+
+    def _on_task_progress(self, task_name, step):
+        """Show the task being run in the progress dialog."""
+        self.progress_dialog.setLabelText(task_name)
+        self.progress_dialog.setValue(step)
+
+    def _on_task_finished(self, task_name, elapsed_time):
+        """Display the time taken by a task and start the next one."""
+        print(f"{task_name} completed in {elapsed_time:.2f} seconds.")
+        self._done_tasks += 1
+        self._run_next_task()
+
+    def _on_task_failed(self, task_name, message):
+        """Stop the processing when a task raised an error."""
+        print(f"{task_name} failed: {message}")
+        QMessageBox.critical(self, "Processing error",
+                             f"{task_name} failed:\n{message}")
+        self._finish_processing()
+
+    def _finish_processing(self):
+        """Refresh the wafer buttons and close the progress dialog."""
+        self._pending_tasks = None
+        self._current_task = None
+
+        # The folder content may have changed, force a rescan
+        self._subdirs_cache = None
+        self.update_wafer()
+        self.progress_dialog.close()
 
 
 if __name__ == "__main__":
@@ -6,7 +6,27 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QTableWidget, QPushButton,
     QTableWidgetItem
 )
-from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtCore import pyqtSignal, QTimer
+
+SAVE_DELAY = 500  # Milliseconds without edits before the settings are saved
+
+
+def load_settings_data(data_file):
+    """Load the settings rows from the JSON file without building the
+    settings window, as a list of {"Scale", "Image Type"} dictionaries."""
+    try:
+        with open(data_file, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        print("No previous data found. Starting fresh.")
+        return []
+    except Exception as err:
+        print(f"Error loading data: {err}")
+        return []
+
+    return [{"Scale": row_data.get("Scale", ""),
+             "Image Type": row_data.get("Image Type", "")}
+            for row_data in data]
 
 class SettingsWindow(QDialog):
     """Class for settings window"""
@@ -23,6 +43,13 @@ class SettingsWindow(QDialog):
         self.new_folder = os.path.join(self.user_folder, "SEM")
         self.data_file = os.path.join(self.new_folder, "settings_data.json")
         self.data = []  # Structure to store the table data
+        self._last_hash = None  # Hash of the content of the settings file
+
+        # Coalesce the saves of consecutive cell edits into a single write
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(SAVE_DELAY)
+        self._save_timer.timeout.connect(self.save_data)
 
         # Set up the UI layout
         self.layout = QVBoxLayout()
@@ -63,7 +90,8 @@ class SettingsWindow(QDialog):
         add_button = QPushButton("Add Row")
         remove_button = QPushButton("Remove Selected Row")
 
-        add_button.clicked.connect(self.add_row)
+        # clicked passes its checked state, keep the default row values
+        add_button.clicked.connect(lambda: self.add_row())
         remove_button.clicked.connect(self.remove_selected_row)
 
         self.layout.addWidget(add_button)
@@ -77,8 +105,11 @@ class SettingsWindow(QDialog):
         scale_item = QTableWidgetItem(scale)
         image_type_item = QTableWidgetItem(image_type)
 
+        # The new row is appended to self.data below, not through update_data
+        was_blocked = self.table.blockSignals(True)
         self.table.setItem(row_position, 0, scale_item)
         self.table.setItem(row_position, 1, image_type_item)
+        self.table.blockSignals(was_blocked)
 
         if update_data:
             self.data.append({"Scale": scale, "Image Type": image_type})
@@ -105,6 +136,10 @@ class SettingsWindow(QDialog):
             if column == 0:  # Update "Scale"
                 if not value.replace('.', '', 1).isdigit():
                     print(f"Invalid value for Scale: {value}")
+                    # Put back the value that is kept and saved
+                    was_blocked = self.table.blockSignals(True)
+                    item.setText(self.data[row]["Scale"])
+                    self.table.blockSignals(was_blocked)
                     return
                 self.data[row]["Scale"] = value
             elif column == 1:  # Update "Image Type"
@@ -113,33 +148,46 @@ class SettingsWindow(QDialog):
                 print(f"Unexpected column index: {column}")
                 return
 
-            self.save_data()
+            self._save_timer.start()  # Restart the delay on each edit
             print(f"Data updated successfully: {self.data[row]}")
         except Exception as e:
             print(f"Error updating data: {e}")
 
-    def closeEvent(self, event):
-        """Save data to a file when the dialog is closed."""
+    def done(self, result):
+        """Save data to a file when the dialog is closed, whether by the
+        close button, Esc (reject) or accept."""
+        self._save_timer.stop()
         self.save_data()
         self.data_updated.emit()
-        super().closeEvent(event)
-
-    def normalize_data(self):
-        """Synchronize self.data with the actual table contents."""
-        self.data = self.get_table_data()
+        super().done(result)
 
     def save_data(self):
-        """Save the table data to a JSON file."""
-        self.normalize_data()
-        with open(self.data_file, "w") as file:
-            json.dump(self.data, file, indent=4)
+        """Save the table data to a JSON file.
+
+        self.data is kept in sync with the table by add_row, remove_selected_row
+        and update_data, so it is saved as is without rescanning the table."""
+        assert len(self.data) == self.table.rowCount(), \
+            "Settings data out of sync with the table"
+        payload = json.dumps(self.data, indent=4).encode("utf-8")
+        payload_hash = hash(payload)
+        if payload_hash == self._last_hash:
+            return  # The file already holds this content
+
+        # Write to a temporary file first so the settings are never truncated
+        tmp_file = self.data_file + ".tmp"
+        with open(tmp_file, "wb") as file:
+            file.write(payload)
+        os.replace(tmp_file, self.data_file)
+        self._last_hash = payload_hash
         print("Data saved successfully.")
 
     def load_data(self):
         """Load the table data from the JSON file."""
         try:
-            with open(self.data_file, "r") as file:
-                self.data = json.load(file)
+            with open(self.data_file, "rb") as file:
+                payload = file.read()
+            self.data = json.loads(payload)
+            self._last_hash = hash(payload)
             print("Data loaded successfully:", self.data)
         except FileNotFoundError:
             print("No previous data found. Starting fresh.")
@@ -154,17 +202,3 @@ class SettingsWindow(QDialog):
             self.add_row(row_data.get("Scale", ""),
                         row_data.get("Image Type", ""), update_data=False)
         self.table.blockSignals(False)
-
-    def get_table_data(self):
-        """Get the current data from the table as a list of dictionaries."""
-        table_data = []
-        for row in range(self.table.rowCount()):
-            scale_item = self.table.item(row, 0)
-            image_type_item = self.table.item(row, 1)
-
-            if scale_item and image_type_item:
-                scale = scale_item.text()
-                image_type = image_type_item.text()
-                table_data.append({"Scale": scale, "Image Type": image_type})
-
-        return table_data 
@@ -1,28 +1,28 @@
-"""Module containing all styles for the GUI"""
+"""Module containing all styles for the GUI
 
-# Radio button styles
-RADIO_BUTTON_STYLE = """
-    QRadioButton {
-        spacing: 0px;
-        font-size: 14px;
-    }
-    QRadioButton::indicator {
-        width: 20px;
-        height: 20px;
-    }
-    QRadioButton::indicator:checked {
-        background-color: #f0ca41;
-        border: 2px solid black;
-    }
-    QRadioButton::indicator:unchecked {
-        background-color: white;
-        border: 2px solid #ccc;
+The styles are gathered in GLOBAL_STYLE, installed once on the application.
+Widgets select their rules by object name.
+"""
+
+import re
+import sys
+from semapp.Plot.styles import (
+    OPEN_BUTTON_STYLE,
+    SAVE_BUTTON_STYLE,
+    MESSAGE_BOX_STYLE,
+    FRAME_STYLE,
+)
+
+# Main window style, the background applies to every child widget
+MAIN_WINDOW_STYLE = """
+    QWidget#main, QWidget#main * {
+        background-color: #F5F5F5;
     }
 """
 
 # Settings button style
 SETTINGS_BUTTON_STYLE = """
-    QPushButton {
+    QPushButton#settings {
         font-size: 16px;
         background-color: #b3e5fc; 
         border: 2px solid #8c8c8c;
@@ -30,14 +30,14 @@ SETTINGS_BUTTON_STYLE = """
         padding: 5px;
         height: 100px;
     }
-    QPushButton:hover {
+    QPushButton#settings:hover {
         background-color: #64b5f6; 
     }
 """
 
 # Run button style
 RUN_BUTTON_STYLE = """
-    QPushButton {
+    QPushButton#run {
         font-size: 16px;
         background-color: #ffcc80;
         border: 2px solid #8c8c8c;
@@ -45,21 +45,21 @@ RUN_BUTTON_STYLE = """
         padding: 5px;
         height: 100px;
     }
-    QPushButton:hover {
+    QPushButton#run:hover {
         background-color: #ffb74d;
     }
 """
 
 # Group box style
 GROUP_BOX_STYLE = """
-    QGroupBox {
+    QWidget#main QGroupBox {
         border: 1px solid black;
         border-radius: 5px;
         margin-top: 10px;
         font-size: 20px;
         font-weight: bold;
     }
-    QGroupBox::title {
+    QWidget#main QGroupBox::title {
         font-size: 14px; 
         font-weight: bold;
         subcontrol-origin: margin;
@@ -67,86 +67,92 @@ GROUP_BOX_STYLE = """
     }
 """
 
-# Wafer button styles
-WAFER_BUTTON_DEFAULT_STYLE = """
-    QRadioButton {
+# Radio button styles. Tool buttons are named "tool", wafer buttons "wafer" and image type
+# buttons "image"; the "state" property of a wafer button tells whether
+# its folder exists.
+RADIO_BUTTONS_STYLE = """
+    QRadioButton#tool {
         spacing: 0px;
-        font-size: 16px;
+        font-size: 14px;
     }
-    QRadioButton::indicator {
-        width: 25px;
-        height: 25px;
+    QRadioButton#tool::indicator {
+        width: 20px;
+        height: 20px;
     }
-    QRadioButton::indicator:checked {
-        background-color: #ccffcc;
+    QRadioButton#tool::indicator:checked {
+        background-color: #f0ca41;
         border: 2px solid black;
     }
-    QRadioButton::indicator:unchecked {
+    QRadioButton#tool::indicator:unchecked {
         background-color: white;
         border: 2px solid #ccc;
     }
-"""
-
-WAFER_BUTTON_EXISTING_STYLE = """
-    QRadioButton {
+    QRadioButton#wafer, QRadioButton#image {
         spacing: 0px;
         font-size: 16px;
     }
-    QRadioButton::indicator {
+    QRadioButton#wafer::indicator, QRadioButton#image::indicator {
         width: 25px;
         height: 25px;
-        border: 2px solid #ccc;
-        background-color: lightblue;
     }
-    QRadioButton::indicator:checked {
+    QRadioButton#wafer::indicator:checked,
+    QRadioButton#image::indicator:checked {
         background-color: #ccffcc;
         border: 2px solid black;
     }
-    QRadioButton::indicator:unchecked {
-        background-color: lightblue;
-        border: 2px solid #ccc;
-    }
-"""
-
-WAFER_BUTTON_MISSING_STYLE = """
-    QRadioButton {
-        spacing: 0px;
-        font-size: 16px;
-    }
-    QRadioButton::indicator {
-        width: 25px;
-        height: 25px;
+    QRadioButton#wafer::indicator:unchecked,
+    QRadioButton#image::indicator:unchecked {
+        background-color: white;
         border: 2px solid #ccc;
-        background-color: lightcoral;
     }
-    QRadioButton::indicator:checked {
-        background-color: #ccffcc;
-        border: 2px solid black;
+    QRadioButton#wafer[state="existing"]::indicator:unchecked {
+        background-color: lightblue;
     }
-    QRadioButton::indicator:unchecked {
+    QRadioButton#wafer[state="missing"]::indicator:unchecked {
         background-color: lightcoral;
-        border: 2px solid #ccc;
     }
 """
 
 # Style pour les boutons de sélection de dossier/fichier
 SELECT_BUTTON_STYLE = """
-    QPushButton {
+    QPushButton#select {
         font-size: 16px;
         background-color: #b3e5fc; 
         border: 2px solid #8c8c8c;
         border-radius: 10px; 
         padding: 10px;
     }
-    QPushButton:hover {
+    QPushButton#select:hover {
         background-color: #64b5f6; 
     }
 """
 
 # Style pour les labels de chemin
 PATH_LABEL_STYLE = """
-    QLabel {
+    QLabel#path {
         font-size: 14px;
         padding: 5px;
     }
-""" 
\ No newline at end of file
+"""
+
+
+def _minify(style):
+    """Collapse the whitespace of a style sheet, for a shorter parse."""
+    return re.sub(r"\s+", " ", style).strip()
+
+
+# Style sheet of the whole application. The plot frame rules come last so
+# that they win over the main window background.
+GLOBAL_STYLE = sys.intern(_minify("".join((
+    MAIN_WINDOW_STYLE,
+    SETTINGS_BUTTON_STYLE,
+    RUN_BUTTON_STYLE,
+    GROUP_BOX_STYLE,
+    RADIO_BUTTONS_STYLE,
+    SELECT_BUTTON_STYLE,
+    PATH_LABEL_STYLE,
+    OPEN_BUTTON_STYLE,
+    SAVE_BUTTON_STYLE,
+    MESSAGE_BOX_STYLE,
+    FRAME_STYLE,
+))))
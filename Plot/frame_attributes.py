@@ -4,24 +4,77 @@ for plotting and saving combined screenshots of images and plots.
 """
 import os
 import numpy as np
-import glob
-import re
+from functools import lru_cache
 import pandas as pd
 from PIL import Image
 from PyQt5.QtWidgets import QFrame, QGroupBox, QWidget, QVBoxLayout, QPushButton, \
     QGridLayout, QLabel, QFileDialog, QProgressDialog, QMessageBox
 from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import matplotlib.pyplot as plt
 from semapp.Plot.utils import create_savebutton
-from semapp.Plot.styles import OPEN_BUTTON_STYLE, MESSAGE_BOX_STYLE, FRAME_STYLE
+from semapp.Processing.processing import read_positions
 
 # Constants
 FRAME_SIZE = 600
 CANVAS_SIZE = 600
+# Above this downscale ratio a box filter looks the same as bilinear
+BOX_RATIO = 4
 radius = 10
+# Wafer radii (cm), the plot uses the smallest one holding every defect
+WAFER_RADII = np.array([5, 7.5, 10, 15])
+
+
+@lru_cache(maxsize=64)  # A few wafers' worth of pages
+def _load_tiff_page(tiff_path, _mtime, index):
+    """Load one page of a TIFF file, resized for display.
+
+    The modification time is only part of the cache key, so that a
+    rewritten file is decoded again. Pages of the wafers opened before are
+    kept until the least recently used ones are evicted."""
+    with Image.open(tiff_path) as img:
+        img.seek(index)
+        if max(img.size) / CANVAS_SIZE > BOX_RATIO:
+            resample = Image.Resampling.BOX
+        else:
+            resample = Image.Resampling.BILINEAR
+        return img.resize((CANVAS_SIZE, CANVAS_SIZE), resample)
+
+
+class PageLoaderSignals(QObject):
+    """Signals emitted by a PageLoader, delivered in the GUI thread."""
+    loaded = pyqtSignal(object, QImage)  # Page key, page image
+    failed = pyqtSignal(object, str)  # Page key, error message
+
+
+class PageLoader(QRunnable):
+    """Decode and resize a TIFF page in a worker thread of the thread pool."""
+
+    def __init__(self, key):
+        super().__init__()
+        self.key = key  # (tiff_path, mtime, index)
+        self.signals = PageLoaderSignals()
+
+    def run(self):
+        """Load the page and wrap its pixels in a QImage."""
+        try:
+            page = _load_tiff_page(*self.key)
+            if page.mode == "L":  # Grayscale SEM image, 1 byte per pixel
+                image_format, depth = QImage.Format_Grayscale8, 1
+            else:
+                page = page.convert("RGBA")
+                image_format, depth = QImage.Format_RGBA8888, 4
+            data = page.tobytes()
+            # Explicit stride, the copy owns the pixels once data is released
+            qimage = QImage(data, page.width, page.height,
+                            depth * page.width, image_format).copy()
+        except Exception as error:  # pylint: disable=broad-except
+            self.signals.failed.emit(self.key, str(error))
+            return
+        self.signals.loaded.emit(self.key, qimage)
+
 
 class PlotFrame(QWidget):
     """
@@ -46,9 +99,19 @@ class PlotFrame(QWidget):
         
         # Initialize state
         self.coordinates = None
-        self.image_list = []
+        self.xy = None  # (n, 2) array of the coordinates, for on_click
+        self.tiff_path = None
+        self.tiff_mtime = None
+        self.page_count = 0
         self.current_index = 0
+        self.pixmap_cache = {}
+        self.page_loaders = {}  # Page key -> PageLoader in progress
         self.canvas_connection_id = None
+        self.scatter = None  # Defect positions, None until the axes are set up
+        self.circle = None  # Wafer outline
+        self.highlight = None  # Red point on the selected defect
+        self.coord_text = None  # Coordinates of the selected defect
+        self.background = None  # Plot without the highlight, for blitting
         self.selected_wafer = None
         self.radius = None
         
@@ -76,7 +139,7 @@ class PlotFrame(QWidget):
         """Create a styled frame with fixed size."""
         frame = QFrame()
         frame.setFrameShape(QFrame.StyledPanel)
-        frame.setStyleSheet(FRAME_STYLE)
+        frame.setObjectName("plot")
         frame.setFixedSize(FRAME_SIZE+100, FRAME_SIZE)
         return frame
 
@@ -85,6 +148,7 @@ class PlotFrame(QWidget):
         self.figure = Figure(figsize=(5, 5))
         self.ax = self.figure.add_subplot(111)
         self.canvas = FigureCanvas(self.figure)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
         self.frame_right_layout.addWidget(self.canvas)
         
         # Initialize image display
@@ -97,85 +161,18 @@ class PlotFrame(QWidget):
         create_savebutton(self.layout, self.frame_left, self.frame_right)
         
         open_button = QPushButton('Open TIFF', self)
-        open_button.setStyleSheet(OPEN_BUTTON_STYLE)
+        open_button.setObjectName("open")
         open_button.clicked.connect(self.open_tiff)
         self.layout.addWidget(open_button, 1, 5)
     
     def extract_positions(self, filepath):
+        """Load the corrected defect positions of a recipe (.001) file."""
+        x_corr, y_corr = read_positions(filepath)
 
-        data = {
-            "SampleSize": None,
-            "DiePitch": {"X": None, "Y": None},
-            "DieOrigin": {"X": None, "Y": None},
-            "SampleCenterLocation": {"X": None, "Y": None},
-            "Defects": []
-        }
-
-        dans_defect_list = False
-
-        with open(filepath, "r", encoding="utf-8") as f:
-            for ligne in f:
-                ligne = ligne.strip()
-
-                if ligne.startswith("SampleSize"):
-                    match = re.search(r"SampleSize\s+1\s+(\d+)", ligne)
-                    if match:
-                        data["SampleSize"] = int(match.group(1))
-
-                elif ligne.startswith("DiePitch"):
-                    match = re.search(r"DiePitch\s+([0-9.]+)\s+([0-9.]+);", ligne)
-                    if match:
-                        data["DiePitch"]["X"] = float(match.group(1))
-                        data["DiePitch"]["Y"] = float(match.group(2))
-
-                elif ligne.startswith("DieOrigin"):
-                    match = re.search(r"DieOrigin\s+([0-9.]+)\s+([0-9.]+);", ligne)
-                    if match:
-                        data["DieOrigin"]["X"] = float(match.group(1))
-                        data["DieOrigin"]["Y"] = float(match.group(2))
-
-                elif ligne.startswith("SampleCenterLocation"):
-                    match = re.search(r"SampleCenterLocation\s+([0-9.]+)\s+([0-9.]+);", ligne)
-                    if match:
-                        data["SampleCenterLocation"]["X"] = float(match.group(1))
-                        data["SampleCenterLocation"]["Y"] = float(match.group(2))
-
-                elif ligne.startswith("DefectList"):
-                    dans_defect_list = True
-                    continue
-
-                elif dans_defect_list:
-                    if re.match(r"^\d+\s", ligne):
-                        valeurs = ligne.split()
-                        if len(valeurs) >= 18:
-                            defect = {f"val{i+1}": float(val) for i, val in enumerate(valeurs[:18])}
-                            data["Defects"].append(defect)
-
-        pitch_x = data["DiePitch"]["X"]
-        pitch_y = data["DiePitch"]["Y"]
-        Xcenter = data["SampleCenterLocation"]["X"]
-        Ycenter = data["SampleCenterLocation"]["Y"]
-
-        corrected_positions = []
-
-        for d in data["Defects"]:
-            val1 = d["val1"]
-            val2 = d["val2"]
-            val3 = d["val3"]
-            val4_scaled = d["val4"] * pitch_x - Xcenter
-            val5_scaled = d["val5"] * pitch_y - Ycenter
-
-            x_corr = round((val2 + val4_scaled) / 10000, 1)
-            y_corr = round((val3 + val5_scaled) / 10000, 1)
-
-            corrected_positions.append({
-                "defect_id": val1,
-                "X": x_corr,
-                "Y": y_corr
-            })
-
-         
-        self.coordinates = pd.DataFrame(corrected_positions, columns=["X", "Y"])
+        # The corrected arrays are new, pandas can hold them without a copy
+        self.coordinates = pd.DataFrame({"X": x_corr, "Y": y_corr},
+                                        copy=False)
+        self.xy = np.column_stack((x_corr, y_corr))
 
         return self.coordinates
 
@@ -187,6 +184,7 @@ class PlotFrame(QWidget):
         """
         if os.path.exists(csv_path):
             self.coordinates = pd.read_csv(csv_path)
+            self.xy = self.coordinates[["X", "Y"]].to_numpy(dtype=np.float64)
             print(f"Coordinates loaded: {self.coordinates.head()}")
         else:
             print(f"CSV file not found: {csv_path}")
@@ -204,14 +202,14 @@ class PlotFrame(QWidget):
         folder_path = os.path.join(self.button_frame.folder_var_changed(), 
                                  str(self.selected_wafer))
         
-                # Recherche du fichier qui se termine par .001 dans le dossier
-        matching_files = glob.glob(os.path.join(folder_path, '*.001'))
-
-        # Si au moins un fichier correspond, on prend le premier
-        if matching_files:
-            recipe_path = matching_files[0]
-        else:
-            recipe_path = None  # Ou tu peux lever une exception ou afficher un message d’erreur
+        # Recherche du premier fichier qui se termine par .001 dans le dossier
+        # (None si aucun fichier ne correspond)
+        try:
+            with os.scandir(folder_path) as entries:
+                recipe_path = next((entry.path for entry in entries
+                                    if entry.name.endswith('.001')), None)
+        except FileNotFoundError:
+            recipe_path = None
         # Charger les coordonnées depuis le fichier CSV (recipe)
         self.coordinates = self.extract_positions(recipe_path)     
         
@@ -230,12 +228,12 @@ class PlotFrame(QWidget):
         msg.setIcon(QMessageBox.Information)
         msg.setText(f"Wafer {self.selected_wafer} opened successfully")
         msg.setWindowTitle("Wafer Opened")
-        msg.setStyleSheet(MESSAGE_BOX_STYLE)
+        msg.setObjectName("message")
         msg.exec_()
 
     def _reset_display(self):
         """
-        Resets the display by clearing the figure and reinitializing the subplot.
+        Resets the display by clearing the axes and plotting the template again.
         Also clears the frame_left_layout to remove any existing widgets.
         """
         # Clear all widgets from the left frame layout
@@ -245,14 +243,16 @@ class PlotFrame(QWidget):
             if widget is not None:
                 widget.deleteLater()  # Properly delete the widget
 
+        self.pixmap_cache.clear()
+
         # Recreate the image label in the left frame
         self.image_label = QLabel(self)
         self.image_label.setAlignment(Qt.AlignCenter)
         self.frame_left_layout.addWidget(self.image_label)
 
-        # Clear the figure associated with the canvas
-        self.figure.clear()
-        self.ax = self.figure.add_subplot(111)  # Create a new subplot
+        # Clear the axes, kept for the lifetime of the frame
+        self.ax.cla()
+        self.scatter = None  # Static artists are gone with the cleared axes
         self.plot_mapping_tpl(self.ax)  # Plot the default template
 
         # Disconnect any existing signal connection
@@ -260,18 +260,12 @@ class PlotFrame(QWidget):
             self.canvas.mpl_disconnect(self.canvas_connection_id)
             self.canvas_connection_id = None
 
-        self.canvas.draw()  # Redraw the updated canvas
-
     def _update_plot(self):
         """
         Updates the plot with the current wafer mapping.
         Ensures the plot is clean before adding new data.
         """
-        if hasattr(self, 'ax') and self.ax:
-            self.ax.clear()  # Clear the existing plot
-        else:
-            self.ax = self.figure.add_subplot(111)  # Create new axes
-
+        # The artists of the plot are updated in place
         self.plot_mapping_tpl(self.ax)  # Plot wafer mapping
 
         # Ensure only one connection to the button press event
@@ -280,63 +274,113 @@ class PlotFrame(QWidget):
 
         self.canvas_connection_id = self.canvas.mpl_connect(
             'button_press_event', self.on_click)
-        self.canvas.draw()
 
     def show_image(self):
         """
         Displays the current image from the image list in the QLabel.
         """
-        if self.image_list:
-            pil_image = self.image_list[self.current_index]
-            pil_image = pil_image.convert("RGBA")
-            data = pil_image.tobytes("raw", "RGBA")
-            qimage = QImage(data, pil_image.width, pil_image.height,
-                            QImage.Format_RGBA8888)
-            pixmap = QPixmap.fromImage(qimage)
-            self.image_label.setPixmap(pixmap)
+        if 0 <= self.current_index < self.page_count:
+            pixmap = self.pixmap_cache.get(self.current_index)
+            if pixmap is not None:
+                self.image_label.setPixmap(pixmap)
+            else:
+                self._start_page_loader(
+                    (self.tiff_path, self.tiff_mtime, self.current_index))
+
+    def _start_page_loader(self, key):
+        """Decode a page off the GUI thread, see _on_page_loaded."""
+        if key in self.page_loaders:
+            return  # Already in progress
+        loader = PageLoader(key)
+        loader.signals.loaded.connect(self._on_page_loaded)
+        loader.signals.failed.connect(self._on_page_failed)
+        # Keep a reference so the signals outlive the worker
+        self.page_loaders[key] = loader
+        QThreadPool.globalInstance().start(loader)
+
+    def _on_draw(self, event):
+        """Save the freshly drawn plot and draw the highlight over it."""
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_highlight()
+
+    def _draw_highlight(self):
+        """Draw the animated selection artists on the canvas."""
+        if self.highlight is not None:
+            self.ax.draw_artist(self.highlight)
+            self.ax.draw_artist(self.coord_text)
+
+    def _on_page_loaded(self, key, qimage):
+        """Store the pixmap of a decoded page and display it if still current."""
+        self.page_loaders.pop(key, None)
+        tiff_path, mtime, index = key
+        if (tiff_path, mtime) != (self.tiff_path, self.tiff_mtime):
+            return  # Another TIFF was opened meanwhile
+
+        self.pixmap_cache[index] = QPixmap.fromImage(qimage)
+        if index == self.current_index:
+            self.image_label.setPixmap(self.pixmap_cache[index])
+
+    def _on_page_failed(self, key, error):
+        """Report a page that could not be decoded."""
+        self.page_loaders.pop(key, None)
+        print(f"Error loading TIFF page {key[2]}: {error}")
+
+    def _setup_static_plot(self, ax):
+        """Create the labels and artists of the plot, filled by plot_mapping_tpl."""
+        ax.set_xlabel('X (cm)', fontsize=20)
+        ax.set_ylabel('Y (cm)', fontsize=20)
+
+        self.scatter = ax.scatter([], [], color='blue', marker='o',
+                                  s=100, label='Positions')
+        # add_artist, unlike add_patch, leaves the autoscaled limits alone
+        self.circle = plt.Circle((0, 0), 1, color='black',
+                                 fill=False, linewidth=0.5, visible=False)
+        ax.add_artist(self.circle)
+
+        # Animated artists are left out of draw() and blitted in on_click
+        self.highlight = ax.scatter([], [], color='red', marker='o', s=100,
+                                    label='Selected point', animated=True)
+        self.coord_text = ax.text(0, 0, "", fontsize=16, color='black',
+                                  animated=True)
+
+        ax.figure.subplots_adjust(left=0.15, right=0.95, top=0.90, bottom=0.1)
 
     def plot_mapping_tpl(self, ax):
         """Plots the mapping of the wafer with coordinate points."""
-        ax.set_xlabel('X (cm)', fontsize=20)
-        ax.set_ylabel('Y (cm)', fontsize=20)
-        
-        if self.coordinates is not None:
-            x_coords = self.coordinates.iloc[:, 0]
-            y_coords = self.coordinates.iloc[:, 1]
+        if self.scatter is None:
+            self._setup_static_plot(ax)
 
+        # A new mapping starts without selected point
+        self.highlight.set_offsets(np.empty((0, 2)))
+        self.coord_text.set_text("")
+
+        if self.coordinates is not None:
             # Calcul de la valeur maximale absolue parmi toutes les coordonnées
-            max_val = max(abs(x_coords).max(), abs(y_coords).max())
-
-            if max_val <= 5:
-                radius = 5
-            elif max_val <= 7.5:
-                radius = 7.5
-            elif max_val <= 10:
-                radius = 10
-            elif max_val <= 15:
-                radius = 15
+            max_val = np.abs(self.xy).max()
+
+            # Premier rayon >= max_val
+            idx = np.searchsorted(WAFER_RADII, max_val)
+            if idx < len(WAFER_RADII):
+                radius = float(WAFER_RADII[idx])
             else:
-                radius = max_val  # fallback pour les cas supérieurs à 30
+                radius = float(max_val)  # fallback pour les cas supérieurs à 15
 
             self.radius = radius
 
-            ax.scatter(x_coords, y_coords, color='blue', marker='o',
-                       s=100, label='Positions')
-            
+            self.scatter.set_offsets(self.xy)
+
                 # Mise à l'échelle du graphique en fonction du radius
             ax.set_xlim(-radius - 1, radius + 1)
             ax.set_ylim(-radius - 1, radius + 1)
 
-            circle = plt.Circle((0, 0), radius, color='black',
-                                fill=False, linewidth=0.5)
-            ax.add_patch(circle)
+            self.circle.set_radius(radius)
+            self.circle.set_visible(True)
             ax.set_aspect('equal')
         else:
             print("No coordinates available to plot")
-        
 
-        ax.figure.subplots_adjust(left=0.15, right=0.95, top=0.90, bottom=0.1)
-        self.canvas.draw()
+        # Redrawn once when the event loop is idle, however many updates
+        self.canvas.draw_idle()
 
     def on_click(self, event):
         """
@@ -357,23 +401,27 @@ class PlotFrame(QWidget):
             y_pos = event.ydata
 
 
-            if self.coordinates is not None and not self.coordinates.empty:
-                distances = np.sqrt((self.coordinates['X'] - x_pos) ** 2 +
-                                    (self.coordinates['Y'] - y_pos) ** 2)
-                closest_idx = distances.idxmin()
-                closest_pt = self.coordinates.iloc[closest_idx]
-                print(f"The closest point is: X = {closest_pt['X']}, "
-                      f"Y = {closest_pt['Y']}")
-
-                # Replot with a red circle around the selected point
-                self.ax.clear()  # Clear the existing plot
-                self.plot_mapping_tpl(self.ax)
-                self.ax.scatter([closest_pt['X']], [closest_pt['Y']],
-                                color='red', marker='o', s=100,
-                                label='Selected point')
-                coord_text = f"{closest_pt['X']:.1f} / {closest_pt['Y']:.1f}"
-                self.ax.text(-self.radius -0.5, self.radius-0.5, coord_text, fontsize=16, color='black')
-                self.canvas.draw()
+            if self.xy is not None and len(self.xy):
+                # Squared distances give the same closest point
+                distances = ((self.xy[:, 0] - x_pos) ** 2 +
+                             (self.xy[:, 1] - y_pos) ** 2)
+                closest_idx = int(distances.argmin())
+                closest_x, closest_y = self.xy[closest_idx]
+                print(f"The closest point is: X = {closest_x}, "
+                      f"Y = {closest_y}")
+
+                # Move the red circle to the selected point
+                self.highlight.set_offsets([[closest_x, closest_y]])
+                coord_text = f"{closest_x:.1f} / {closest_y:.1f}"
+                self.coord_text.set_position((-self.radius - 0.5,
+                                              self.radius - 0.5))
+                self.coord_text.set_text(coord_text)
+                if self.background is None:
+                    self.canvas.draw_idle()
+                else:
+                    self.canvas.restore_region(self.background)
+                    self._draw_highlight()
+                    self.canvas.blit(self.figure.bbox)
 
                 # Update the image based on the selected point
                 result = self.image_type + (closest_idx * self_number_type)
@@ -387,18 +435,14 @@ class PlotFrame(QWidget):
             tiff_path: Path to the TIFF file to load
         """
         try:
-            img = Image.open(tiff_path)
-            self.image_list = []
-
-            # Load all TIFF pages and resize them
-            while True:
-                resized_img = img.copy().resize((CANVAS_SIZE, CANVAS_SIZE),
-                                              Image.Resampling.LANCZOS)
-                self.image_list.append(resized_img)
-                try:
-                    img.seek(img.tell() + 1)  # Move to next page
-                except EOFError:
-                    break  # No more pages
+            self.page_count = 0
+            self.pixmap_cache.clear()
+
+            # Pages are only decoded when they are displayed
+            with Image.open(tiff_path) as img:
+                self.page_count = img.n_frames
+            self.tiff_path = tiff_path
+            self.tiff_mtime = os.path.getmtime(tiff_path)
 
             self.current_index = 0
             self.show_image()  # Display first image
@@ -1,8 +1,12 @@
-"""Styles definitions for the GUI components."""
+"""Styles definitions for the GUI components.
+
+They are part of GLOBAL_STYLE (see semapp.Layout.styles), widgets select
+their rules by object name.
+"""
 
 # Button styles
 OPEN_BUTTON_STYLE = """
-    QPushButton {
+    QPushButton#open {
         font-size: 16px;
         background-color: #ffcc80;
         border: 2px solid #8c8c8c;
@@ -10,31 +14,49 @@ OPEN_BUTTON_STYLE = """
         padding: 5px;
         height: 50px;
     }
-    QPushButton:hover {
+    QPushButton#open:hover {
         background-color: #ffb74d;
     }
 """
 
+SAVE_BUTTON_STYLE = """
+    QPushButton#save {
+        font-size: 16px;
+        background-color: #e1bee7;
+        border: 2px solid #8c8c8c;
+        border-radius: 10px;
+        padding: 5px;
+        height: 20px;
+    }
+    QPushButton#save:hover {
+        background-color: #ce93d8;
+    }
+"""
+
 # Message box styles
 MESSAGE_BOX_STYLE = """
-    QMessageBox {
+    QMessageBox#message {
         background-color: white;
     }
-    QMessageBox QLabel {
+    QMessageBox#message QLabel {
         color: #333;
         font-size: 14px;
     }
-    QPushButton {
+    QMessageBox#message QPushButton {
         background-color: #ffcc80;
         border: 2px solid #8c8c8c;
         border-radius: 5px;
         padding: 5px 15px;
         font-size: 12px;
     }
-    QPushButton:hover {
+    QMessageBox#message QPushButton:hover {
         background-color: #ffb74d;
     }
 """
 
-# Frame styles
-FRAME_STYLE = "background-color: white;" 
\ No newline at end of file
+# Frame styles, the background applies to every child widget
+FRAME_STYLE = """
+    QFrame#plot, QFrame#plot * {
+        background-color: white;
+    }
+"""
\ No newline at end of file
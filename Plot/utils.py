@@ -6,24 +6,13 @@ in the application. It includes functionality for capturing and saving
 combined screenshots of multiple frames.
 """
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QPoint
 from PyQt5.QtWidgets import QPushButton, QFileDialog
-from PyQt5.QtGui import QPixmap, QPainter
+from PyQt5.QtGui import QImage, QImageWriter, QPainter
 
-# Style constants
-SAVE_BUTTON_STYLE = """
-    QPushButton {
-        font-size: 16px;
-        background-color: #e1bee7;
-        border: 2px solid #8c8c8c;
-        border-radius: 10px;
-        padding: 5px;
-        height: 20px;
-    }
-    QPushButton:hover {
-        background-color: #ce93d8;
-    }
-"""
+# Compression of the saved screenshots, on Qt's 0-100 scale (zlib level
+# = value * 9 / 91): 33 is zlib level 3, Qt's default of 50 is level 4
+PNG_COMPRESSION = 33
 
 BUTTON_POSITION = {
     'row': 4,
@@ -49,12 +38,9 @@ def create_savebutton(layout, frame_left, frame_right):
         """
         Capture and save specific frames as a combined image.
 
-        Creates a screenshot of both left and right frames, combines them
-        horizontally and saves the result as a PNG file.
+        Renders both left and right frames side by side in a single image
+        and saves the result as a PNG file.
         """
-        screen_left = frame_left.grab()
-        screen_right = frame_right.grab()
-
         file_name, _ = QFileDialog.getSaveFileName(
             parent=None,
             caption="Save screenshot",
@@ -63,24 +49,29 @@ def create_savebutton(layout, frame_left, frame_right):
         )
 
         if file_name:
-            combined_width = screen_left.width() + screen_right.width()
-            combined_height = max(screen_left.height(), screen_right.height())
-            combined_pixmap = QPixmap(combined_width, combined_height)
+            combined_width = frame_left.width() + frame_right.width()
+            combined_height = max(frame_left.height(), frame_right.height())
+            # Painted in a QImage, written without a pixmap conversion
+            combined_image = QImage(combined_width, combined_height,
+                                    QImage.Format_RGB32)
 
-            # Fill the combined QPixmap with a white background
-            combined_pixmap.fill(Qt.white)
+            # Fill the combined QImage with a white background
+            combined_image.fill(Qt.white)
 
-            painter = QPainter(combined_pixmap)
-            painter.drawPixmap(0, 0, screen_left)
-            painter.drawPixmap(screen_left.width(), 0, screen_right)
+            # The frames render straight into it, without intermediate grabs
+            painter = QPainter(combined_image)
+            frame_left.render(painter, QPoint(0, 0))
+            frame_right.render(painter, QPoint(frame_left.width(), 0))
             painter.end()
 
             # Save the combined image
-            combined_pixmap.save(file_name, "PNG")
+            writer = QImageWriter(file_name, b"PNG")
+            writer.setCompression(PNG_COMPRESSION)
+            writer.write(combined_image)
 
     # Create and configure the save button
     save_button = QPushButton("Screenshot")
-    save_button.setStyleSheet(SAVE_BUTTON_STYLE)
+    save_button.setObjectName("save")  # Styled by GLOBAL_STYLE
     save_button.clicked.connect(save_image)
     
     # Add the button to the layout using position constants
@@ -3,13 +3,281 @@ Module for processing and renaming TIFF files based on CSV coordinates.
 """
 
 import json
+import logging
 import re
 import glob
-import shutil
 import os
-from PIL import Image
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, TiffImagePlugin, TiffTags
+import numpy as np
 import pandas as pd
 
+_log = logging.getLogger(__name__)
+
+# Pattern of the recipe (.001) file lines, read as bytes and leading spaces
+# included. The name of the outer group (match.lastgroup) tells which kind
+# of line was matched
+_RE_LINE = re.compile(
+    rb"\s*(?:(?P<samplesize>SampleSize\s+1\s+(?P<size>\d+))"
+    rb"|(?P<diepitch>DiePitch\s+(?P<pitch_x>[0-9.]+)\s+(?P<pitch_y>[0-9.]+);)"
+    rb"|(?P<dieorigin>DieOrigin\s+(?P<origin_x>[0-9.]+)\s+(?P<origin_y>[0-9.]+);)"
+    rb"|(?P<center>SampleCenterLocation\s+(?P<center_x>[0-9.]+)\s+"
+    rb"(?P<center_y>[0-9.]+);)"
+    rb"|(?P<defectlist>DefectList))")
+
+# Wafer folder names like "w01", renamed to the wafer number
+_RE_WAFER = re.compile(r"w0*(\d+)")
+
+# Class names in the file names of the images exported without tag
+CLASS_INTERNAL = "_Class_1_Internal"
+CLASS_TOPO = "_Class_1_Topography"
+
+# TIFF tags pointing to other data of the source file (tiles, sub-IFDs,
+# EXIF/GPS directories...), a page holding one of them is re-encoded
+# instead of copied
+_POINTER_TAGS = frozenset((288, 289, 324, 325, 330, 513, 514,
+                           34665, 34853, 40965))
+
+
+def _read_defects(f):
+    """
+    Parse the defect rows following DefectList in an open recipe file.
+
+    Args:
+        f: Recipe file object, positioned after the DefectList line.
+
+    Returns:
+        np.ndarray: (n, 18) array holding the first 18 values of the lines
+        starting with a defect id.
+    """
+    lines = f.read().splitlines()
+
+    # One row per remaining line at most, filled in place and trimmed
+    defects = np.empty((len(lines), 18), dtype=np.float64)
+    count = 0
+    for line in lines:
+        # Only the first 18 values are tokenized, the rest stays one chunk
+        value = line.split(None, 18)
+        if len(value) >= 18 and value[0].isdigit():
+            defects[count] = value[:18]
+            count += 1
+
+    return defects[:count]
+
+
+def read_positions(filepath):
+    """
+    Read the corrected defect positions of a recipe (.001) file.
+
+    This is the recipe parser shared by Process and PlotFrame.
+
+    Args:
+        filepath (str): Path of the recipe file.
+
+    Returns:
+        tuple: X and Y arrays (cm) of the defect positions, corrected with
+        the die pitch and the sample center location.
+    """
+    data = {
+        "SampleSize": None,
+        "DiePitch": {"X": None, "Y": None},
+        "DieOrigin": {"X": None, "Y": None},
+        "SampleCenterLocation": {"X": None, "Y": None},
+    }
+
+    # Read as bytes, int() and float() take the matched groups directly
+    with open(filepath, "rb") as f:
+        # Header lines, up to the start of the defect list
+        for line in f:
+            match = _RE_LINE.match(line)
+            if match is None:
+                continue
+            tag = match.lastgroup
+
+            if tag == "samplesize":
+                data["SampleSize"] = int(match.group("size"))
+
+            elif tag == "diepitch":
+                data["DiePitch"]["X"] = float(match.group("pitch_x"))
+                data["DiePitch"]["Y"] = float(match.group("pitch_y"))
+
+            elif tag == "dieorigin":
+                data["DieOrigin"]["X"] = float(match.group("origin_x"))
+                data["DieOrigin"]["Y"] = float(match.group("origin_y"))
+
+            elif tag == "center":
+                data["SampleCenterLocation"]["X"] = float(match.group("center_x"))
+                data["SampleCenterLocation"]["Y"] = float(match.group("center_y"))
+
+            elif tag == "defectlist":
+                break
+
+        # One row per defect, columns val1 (defect id) to val18
+        defects = _read_defects(f)
+
+    pitch_x = data["DiePitch"]["X"]
+    pitch_y = data["DiePitch"]["Y"]
+    x_center = data["SampleCenterLocation"]["X"]
+    y_center = data["SampleCenterLocation"]["Y"]
+
+    if defects.size == 0:
+        return np.empty(0), np.empty(0)
+
+    val4_scaled = defects[:, 3] * pitch_x - x_center
+    val5_scaled = defects[:, 4] * pitch_y - y_center
+    x_corr = np.round((defects[:, 1] + val4_scaled) / 10000, 1)
+    y_corr = np.round((defects[:, 2] + val5_scaled) / 10000, 1)
+    return x_corr, y_corr
+
+
+def _scan(dirpath):
+    """
+    List a directory once and sort its entries by suffix.
+
+    Args:
+        dirpath (str): Path of the directory to scan.
+
+    Returns:
+        tuple: Path of the first recipe (.001) file (or None) and the list of
+        the TIFF file names.
+    """
+    recipe_path = None
+    tiff_files = []
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.endswith(".001"):
+                if recipe_path is None:
+                    recipe_path = entry.path
+            elif name.lower().endswith((".tiff", ".tif")):
+                tiff_files.append(name)
+    return recipe_path, tiff_files
+
+
+def _clean_dir(dirpath, tiff_files):
+    """
+    Delete the TIFF files of a directory that are not a merged data TIFF.
+
+    Args:
+        dirpath (str): Path of the directory to clean.
+        tiff_files (list): TIFF file names of the directory (from _scan),
+            the deleted ones are removed from the list.
+
+    Returns:
+        int: Number of deleted files.
+    """
+    kept = []
+    for name in tiff_files:
+        if "page" in name.lower() or not name.startswith("data"):
+            file_path = os.path.join(dirpath, name)
+            os.remove(file_path)
+            _log.debug("Deleted: %s", file_path)
+        else:
+            kept.append(name)
+    deleted = len(tiff_files) - len(kept)
+    tiff_files[:] = kept
+    return deleted
+
+
+def _copy_page(img, output_file):
+    """
+    Write the current page of an open TIFF file as a single-page TIFF file,
+    copying its tags and its (possibly compressed) strips as they are.
+
+    Args:
+        img (PIL.Image.Image): Open TIFF image, seeked to the page to copy.
+        output_file (str): Path of the TIFF file to write.
+
+    Returns:
+        bool: False when the page cannot be copied as is (tiled page,
+        BigTIFF file, tags pointing to other data of the file...), nothing
+        is written then.
+    """
+    source = getattr(img, "tag_v2", None)
+    if (source is None or _POINTER_TAGS.intersection(source)
+            or TiffImagePlugin.STRIPOFFSETS not in source
+            or TiffImagePlugin.STRIPBYTECOUNTS not in source):
+        return False
+
+    img.fp.seek(0)
+    header = img.fp.read(4)
+    if header not in (b"II*\x00", b"MM\x00*"):
+        return False
+
+    offsets = source[TiffImagePlugin.STRIPOFFSETS]
+    byte_counts = source[TiffImagePlugin.STRIPBYTECOUNTS]
+    if not isinstance(offsets, tuple):
+        offsets, byte_counts = (offsets,), (byte_counts,)
+
+    strips = []
+    for offset, byte_count in zip(offsets, byte_counts):
+        img.fp.seek(offset)
+        strips.append(img.fp.read(byte_count))
+
+    # Same byte order as the source, the strips are not decoded
+    ifd = TiffImagePlugin.ImageFileDirectory_v2(prefix=header[:2])
+    for tag, value in source.items():
+        ifd.tagtype[tag] = source.tagtype[tag]
+        ifd[tag] = value
+
+    # Offsets relative to the end of the directory, where the strips follow
+    relative_offsets = [0]
+    for strip in strips[:-1]:
+        relative_offsets.append(relative_offsets[-1] + len(strip))
+    ifd.tagtype[TiffImagePlugin.STRIPOFFSETS] = TiffTags.LONG
+    ifd[TiffImagePlugin.STRIPOFFSETS] = tuple(relative_offsets)
+    ifd.tagtype[TiffImagePlugin.STRIPBYTECOUNTS] = TiffTags.LONG
+    ifd[TiffImagePlugin.STRIPBYTECOUNTS] = tuple(len(s) for s in strips)
+
+    with open(output_file, "wb") as file:
+        ifd.save(file)
+        file.writelines(strips)
+    return True
+
+
+def _split_pages(tiff_path, parallel=True):
+    """
+    Write each page of a merged TIFF file to its own TIFF file.
+
+    The pages are copied by a thread pool, each worker opening the file and
+    reading only the data of its own page. The strips of a page are copied
+    without being decoded, other pages are decoded and re-encoded by PIL.
+
+    Args:
+        tiff_path (str): Path of the merged TIFF file.
+        parallel (bool): False to copy the pages one after the other from
+            a single open file, when the caller already runs in a pool.
+
+    Returns:
+        list: List of file paths of the generated TIFF files.
+    """
+    with Image.open(tiff_path) as img:
+        page_count = getattr(img, "n_frames", 1)
+
+    prefix = tiff_path.replace(".tif", "")
+    output_files = [f"{prefix}_page_{index + 1}.tiff"
+                    for index in range(page_count)]
+
+    def write_page(img, index):
+        img.seek(index)
+        if not _copy_page(img, output_files[index]):
+            img.save(output_files[index], format="TIFF")
+
+    def open_and_write_page(index):
+        with Image.open(tiff_path) as img:
+            write_page(img, index)
+
+    if parallel:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            list(executor.map(open_and_write_page, range(page_count)))
+    else:
+        with Image.open(tiff_path) as img:
+            for index in range(page_count):
+                write_page(img, index)
+
+    return output_files
+
 
 class Process:
     """
@@ -17,7 +285,7 @@ class Process:
     coordinates from a CSV file.
     """
 
-    def __init__(self, dirname, wafer=None, scale=None):
+    def __init__(self, dirname, wafer=None, scale=None, settings=None):
         """
         Initialize the processing instance with necessary parameters.
 
@@ -26,102 +294,54 @@ class Process:
             recipe (str): The CSV file containing coordinates.
             wafer (str): The wafer number (optional).
             scale (str): The path to the settings JSON file (optional).
+            settings (list): The already loaded settings data (optional).
+                When given, the settings JSON file is not read.
         """
         self.dirname = dirname
         self.scale_data = scale
         self.wafer_number = str(wafer)
         self.tiff_path = None
         self.coordinates = None
-        self.settings = None
+        self.settings = settings
         self.output_dir = None
-        self.load_json()
+        # Parsed recipes, keyed by (path, modification time)
+        self._recipe_cache = {}
+        if self.settings is None:
+            self.load_json()
     def load_json(self):
         """Load the settings data from a JSON file."""
         try:
             with open(self.scale_data, "r", encoding="utf-8") as file:
                 self.settings = json.load(file)
-            print("Settings data loaded successfully.")
+            _log.info("Settings data loaded successfully.")
         except FileNotFoundError:
-            print("Settings file not found. Starting fresh.")
+            _log.warning("Settings file not found. Starting fresh.")
             self.settings = []
         except json.JSONDecodeError as error:
-            print(f"JSON decoding error: {error}")
+            _log.error("JSON decoding error: %s", error)
             self.settings = []
         except OSError as error:
-            print(f"OS error when reading file: {error}")
+            _log.error("OS error when reading file: %s", error)
             self.settings = []   
     def extract_positions(self, filepath):
         '''Function to extract positions from a 001 file.'''
-        data = {
-            "SampleSize": None,
-            "DiePitch": {"X": None, "Y": None},
-            "DieOrigin": {"X": None, "Y": None},
-            "SampleCenterLocation": {"X": None, "Y": None},
-            "Defects": []
-        }
-
-        dans_defect_list = False
-
-        with open(filepath, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-
-                if line.startswith("SampleSize"):
-                    match = re.search(r"SampleSize\s+1\s+(\d+)", line)
-                    if match:
-                        data["SampleSize"] = int(match.group(1))
-
-                elif line.startswith("DiePitch"):
-                    match = re.search(r"DiePitch\s+([0-9.]+)\s+([0-9.]+);", line)
-                    if match:
-                        data["DiePitch"]["X"] = float(match.group(1))
-                        data["DiePitch"]["Y"] = float(match.group(2))
-
-                elif line.startswith("DieOrigin"):
-                    match = re.search(r"DieOrigin\s+([0-9.]+)\s+([0-9.]+);", line)
-                    if match:
-                        data["DieOrigin"]["X"] = float(match.group(1))
-                        data["DieOrigin"]["Y"] = float(match.group(2))
-
-                elif line.startswith("SampleCenterLocation"):
-                    match = re.search(r"SampleCenterLocation\s+([0-9.]+)\s+([0-9.]+);", line)
-                    if match:
-                        data["SampleCenterLocation"]["X"] = float(match.group(1))
-                        data["SampleCenterLocation"]["Y"] = float(match.group(2))
-
-                elif line.startswith("DefectList"):
-                    dans_defect_list = True
-                    continue
-
-                elif dans_defect_list:
-                    if re.match(r"^\d+\s", line):
-                        value = line.split()
-                        if len(value) >= 18:
-                            defect = {f"val{i+1}": float(val) for i, val in enumerate(value[:18])}
-                            data["Defects"].append(defect)
-
-        pitch_x = data["DiePitch"]["X"]
-        pitch_y = data["DiePitch"]["Y"]
-        x_center = data["SampleCenterLocation"]["X"]
-        y_center = data["SampleCenterLocation"]["Y"]
-
-        corrected_positions = []
-
-        for d in data["Defects"]:
-            val1 = d["val1"]
-            val2 = d["val2"]
-            val3 = d["val3"]
-            val4_scaled = d["val4"] * pitch_x - x_center
-            val5_scaled = d["val5"] * pitch_y - y_center
-
-            x_corr = round((val2 + val4_scaled) / 10000, 1)
-            y_corr = round((val3 + val5_scaled) / 10000, 1)
-
-            corrected_positions.append({"defect_id": val1, "X": x_corr,"Y": y_corr})
-
-        self.coordinates = pd.DataFrame(corrected_positions, columns=["X", "Y"])
-
-        return self.coordinates
+        # A recipe already parsed and not modified since is not read again
+        key = (filepath, os.stat(filepath).st_mtime_ns)
+        coordinates = self._recipe_cache.get(key)
+        if coordinates is not None:
+            self.coordinates = coordinates
+            return coordinates
+
+        x_corr, y_corr = read_positions(filepath)
+
+        # The corrected arrays are new, pandas can hold them without a copy.
+        # The result is kept in a local, the process_all steps of several
+        # folders can run this method at the same time
+        coordinates = pd.DataFrame({"X": x_corr, "Y": y_corr}, copy=False)
+        self._recipe_cache[key] = coordinates
+        self.coordinates = coordinates
+
+        return coordinates
     def rename(self):
         """
         Rename TIFF files based on the coordinates from the CSV file.
@@ -132,51 +352,43 @@ class Process:
         self.output_dir = os.path.join(self.dirname, self.wafer_number)
 
         if not os.path.exists(self.output_dir):
-            print(f"Directory not found: {self.output_dir}")
+            _log.warning("Directory not found: %s", self.output_dir)
             return
 
-        matching_files = glob.glob(os.path.join(self.output_dir, '*.001'))
-
-        # If at least one file matches, take the first one
-        if matching_files:
-            recipe_path = matching_files[0]
-        else:
-            recipe_path = None  
+        recipe_path, tiff_files = _scan(self.output_dir)
         self.coordinates = self.extract_positions(recipe_path)
+        coords = self.coordinates.to_numpy()  # X, Y columns
 
+        tiff_files = sorted(f for f in tiff_files if "page" in f)
 
+        # Settings values (Scale, Image Type) indexed by page remainder
+        scales = tuple(s["Scale"] for s in self.settings)
+        types = tuple(s["Image Type"] for s in self.settings)
+        n_settings = len(self.settings)
 
-        tiff_files = [f for f in os.listdir(self.output_dir)
-                      if "page" in f and f.lower().endswith(('.tiff', '.tif'))]
-        tiff_files.sort()
-
+        # Build the whole rename plan before touching the files
+        plan = []
         for file in tiff_files:
             # Extract page number from the file name (e.g., data_page_1.tiff)
             file_number = int(file.split('_')[2].split('.')[0])
-            print(f"Processing {file}: Page number {file_number}, Total "
-                  f"settings {len(self.settings)}")
 
             # Calculate the corresponding row in the CSV
-            csv_row_index = (file_number - 1) // len(self.settings)
-            remainder = (file_number - 1) % len(self.settings)
+            csv_row_index, remainder = divmod(file_number - 1, n_settings)
 
             # Get X/Y coordinates from the CSV
-            x = self.coordinates.iloc[csv_row_index, 0]  # First column for X
-            y = self.coordinates.iloc[csv_row_index, 1]  # Second column for Y
+            x, y = coords[csv_row_index]
 
-            # Get settings values (Scale, Image Type)
-            scale = self.settings[remainder]["Scale"]
-            image_type = self.settings[remainder]["Image Type"]
+            scale = scales[remainder]
+            image_type = types[remainder]
 
             # Construct the new file name
             new_name = f"{scale}_{x}_{y}_{image_type}.tif"
+            plan.append((os.path.join(self.output_dir, file),
+                         os.path.join(self.output_dir, new_name)))
 
-            old_path = os.path.join(self.output_dir, file)
-            new_path = os.path.join(self.output_dir, new_name)
-
-            # Rename the file
+        for old_path, new_path in plan:
             os.rename(old_path, new_path)
-            print(f"Renamed: {file} -> {new_name}")
+        _log.info("Renamed %d files in %s", len(plan), self.output_dir)
             
     def split_tiff(self):
         """
@@ -190,27 +402,15 @@ class Process:
                                       "data.tif")
         
 
-        output_files = []
-        page_index = 0
         if not os.path.exists(self.tiff_path):
-            print(f"TIFF file not found: {self.tiff_path}")
+            _log.warning("TIFF file not found: %s", self.tiff_path)
             return []
 
         try:
-            img = Image.open(self.tiff_path)
-            while True:
-                output_file = self.tiff_path.replace(".tif", "") + \
-                              f"_page_{page_index + 1}.tiff"
-                img.save(output_file, format="TIFF")
-                output_files.append(output_file)
-
-                try:
-                    img.seek(page_index + 1)
-                    page_index += 1
-                except EOFError:
-                    break
+            output_files = _split_pages(self.tiff_path)
         except Exception as error:
             raise RuntimeError(f"Error splitting TIFF file: {error}") from error
+        _log.info("Split %d pages from %s", len(output_files), self.tiff_path)
 
         return output_files
     
@@ -225,18 +425,38 @@ class Process:
         self.output_dir = os.path.join(self.dirname, self.wafer_number)
 
         if not os.path.exists(self.output_dir):
-            print(f"Error: Directory does not exist: {self.output_dir}")
+            _log.warning("Directory does not exist: %s", self.output_dir)
             return
 
-        tiff_files = [f for f in os.listdir(self.output_dir)
-                      if f.lower().endswith(('.tiff', '.tif'))]
-
         # Delete non-conforming files
-        for file_name in tiff_files:
-            if not file_name.startswith("data") or "page" in file_name.lower() or file_name.endswith("001"):
-                file_path = os.path.join(self.output_dir, file_name)
-                os.remove(file_path)
-                print(f"Deleted: {file_path}")
+        _, tiff_files = _scan(self.output_dir)
+        deleted = _clean_dir(self.output_dir, tiff_files)
+        _log.info("Deleted %d files in %s", deleted, self.output_dir)
+
+    def process_all(self, steps):
+        """
+        Run per-folder processing steps on all subdirectories, walking the
+        directory tree only once.
+
+        The folders are independent and processed concurrently by a thread
+        pool, the steps of one folder running in order. Each step is called
+        as step(subdir, recipe_path, tiff_files) with the listing of the
+        folder, which the steps keep up to date when they add or remove TIFF
+        files.
+
+        Args:
+            steps (list): Per-folder methods, in the order to run them.
+        """
+        subdirs = [subdir for subdir, _, _ in os.walk(self.dirname)
+                   if subdir != self.dirname]
+
+        def process_folder(subdir):
+            recipe_path, tiff_files = _scan(subdir)
+            for step in steps:
+                step(subdir, recipe_path, tiff_files)
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            list(executor.map(process_folder, subdirs))
 
     def split_tiff_all(self):
         """
@@ -246,34 +466,7 @@ class Process:
         This method will look through all directories and split each `data.tif`
         file into separate pages.
         """
-        for subdir, _, _ in os.walk(self.dirname):
-            if subdir != self.dirname:
-                self.tiff_path = os.path.join(subdir, "data.tif")
-                print(f"Processing directory: {subdir}, "
-                      f"TIFF path: {self.tiff_path}")
-
-                output_files = []
-                page_index = 0
-                if not os.path.exists(self.tiff_path):
-                    print(f"TIFF file not found: {self.tiff_path}")
-                    continue
-
-                try:
-                    img = Image.open(self.tiff_path)
-                    while True:
-                        output_file = self.tiff_path.replace(".tif", "") + \
-                                      f"_page_{page_index + 1}.tiff"
-                        img.save(output_file, format="TIFF")
-                        output_files.append(output_file)
-
-                        try:
-                            img.seek(page_index + 1)
-                            page_index += 1
-                        except EOFError:
-                            break
-                except Exception as error:
-                    raise RuntimeError(f"Error splitting "
-                                       f"TIFF file: {error}") from error
+        self.process_all([self._split_folder])
 
     def rename_all(self):
         """
@@ -283,75 +476,90 @@ class Process:
         This method will iterate through all subdirectories,
         loading the CSV and settings, and renaming files accordingly.
         """
+        self.process_all([self._rename_folder])
 
-        for subdir, _, _ in os.walk(self.dirname):
-            if subdir != self.dirname:
-                self.output_dir = os.path.join(self.dirname,
-                                               os.path.basename(subdir))
-                print(f"Renaming files in: {self.output_dir}")
+    def split_rename_all(self):
+        """
+        Split and rename the TIFF files of all subdirectories in a single
+        walk, same as split_tiff_all followed by rename_all.
+        """
+        self.process_all([self._split_folder, self._rename_folder])
 
-                matching_files = glob.glob(os.path.join(self.output_dir, '*.001'))
+    def clean_all(self):
+        """
+        Delete all non-conforming TIFF files in all subdirectories.
 
-                if matching_files:
-                    recipe_path = matching_files[0]
-                else:
-                    return
-                self.coordinates = self.extract_positions(recipe_path)
+        This method will remove any files that do not follow the expected
+         naming conventions in all directories.
+        """
+        self.process_all([self._clean_folder])
 
-                if self.coordinates is None or self.coordinates.empty:
-                    raise ValueError("Coordinates have not been loaded or are empty.")
+    def _split_folder(self, subdir, recipe_path, tiff_files):
+        """Split the merged `data.tif` file of one folder (process_all step)."""
+        tiff_path = os.path.join(subdir, "data.tif")
+        _log.debug("Processing directory: %s", subdir)
 
-                tiff_files = [f for f in os.listdir(self.output_dir)
-                              if "page" in f and
-                              f.lower().endswith(('.tiff', '.tif'))]
-                tiff_files.sort()
+        if "data.tif" not in tiff_files:
+            _log.warning("TIFF file not found: %s", tiff_path)
+            return
 
-                for file in tiff_files:
-                    file_number = int(file.split('_')[2].split('.')[0])
-                    print(f"Processing {file}: Page number {file_number}, "
-                          f"Total settings {len(self.settings)}")
+        try:
+            # The folders already run in the process_all thread pool
+            output_files = _split_pages(tiff_path, parallel=False)
+        except Exception as error:
+            raise RuntimeError(f"Error splitting "
+                               f"TIFF file: {error}") from error
+        # Pages left by a previous split are overwritten, not listed twice
+        existing = set(tiff_files)
+        tiff_files.extend(name for name in map(os.path.basename, output_files)
+                          if name not in existing)
+        _log.info("Split %d pages from %s", len(output_files), tiff_path)
+
+    def _rename_folder(self, subdir, recipe_path, tiff_files):
+        """Rename the page files of one folder (process_all step), folders
+        without a recipe file are skipped."""
+        _log.debug("Renaming files in: %s", subdir)
+
+        if recipe_path is None:
+            _log.warning("No recipe file found in: %s", subdir)
+            return
+        coordinates = self.extract_positions(recipe_path)
 
-                    csv_row_index = (file_number - 1) // len(self.settings)
-                    remainder = (file_number - 1) % len(self.settings)
+        if coordinates is None or coordinates.empty:
+            raise ValueError("Coordinates have not been loaded or are empty.")
+        coords = coordinates.to_numpy()  # X, Y columns
 
-                    x = self.coordinates.iloc[csv_row_index, 0]
-                    y = self.coordinates.iloc[csv_row_index, 1]
+        scales = tuple(s["Scale"] for s in self.settings)
+        types = tuple(s["Image Type"] for s in self.settings)
+        n_settings = len(self.settings)
 
-                    scale = self.settings[remainder]["Scale"]
-                    image_type = self.settings[remainder]["Image Type"]
+        page_files = sorted(f for f in tiff_files if "page" in f)
 
-                    new_name = f"{scale}_{x}_{y}_{image_type}.tif"
-                    old_path = os.path.join(self.output_dir, file)
-                    new_path = os.path.join(self.output_dir, new_name)
+        plan = []
+        for file in page_files:
+            file_number = int(file.split('_')[2].split('.')[0])
 
-                    os.rename(old_path, new_path)
-                    print(f"Renamed: {file} -> {new_name}")
+            csv_row_index, remainder = divmod(file_number - 1, n_settings)
 
-    def clean_all(self):
-        """
-        Delete all non-conforming TIFF files in all subdirectories.
+            x, y = coords[csv_row_index]
 
-        This method will remove any files that do not follow the expected
-         naming conventions in all directories.
-        """
-        for subdir, _, _ in os.walk(self.dirname):
-            if subdir != self.dirname:
-                self.output_dir = os.path.join(self.dirname,
-                                               os.path.basename(subdir))
-                print(f"Cleaning directory: {self.output_dir}")
-
-                if not os.path.exists(self.output_dir):
-                    print(f"Error: Directory does not exist: {self.output_dir}")
-                    continue
+            new_name = f"{scales[remainder]}_{x}_{y}_{types[remainder]}.tif"
+            plan.append((file, new_name))
+
+        for file, new_name in plan:
+            os.rename(os.path.join(subdir, file),
+                      os.path.join(subdir, new_name))
+        _log.info("Renamed %d files in %s", len(plan), subdir)
 
-                tiff_files = [f for f in os.listdir(self.output_dir)
-                              if f.lower().endswith(('.tiff', '.tif'))]
-                for file_name in tiff_files:
-                    if not file_name.startswith("data") or \
-                            "page" in file_name.lower() or file_name.endswith("001"):
-                        file_path = os.path.join(self.output_dir, file_name)
-                        os.remove(file_path)
-                        print(f"Deleted: {file_path}")
+        renamed = set(page_files)
+        tiff_files[:] = [f for f in tiff_files if f not in renamed]
+        tiff_files.extend(new_name for _, new_name in plan)
+
+    def _clean_folder(self, subdir, recipe_path, tiff_files):
+        """Delete the non-conforming TIFF files of one folder
+        (process_all step)."""
+        deleted = _clean_dir(subdir, tiff_files)
+        _log.info("Deleted %d files in %s", deleted, subdir)
 
     def organize_and_rename_files(self):
         """
@@ -360,54 +568,49 @@ class Process:
         and rename the files to 'data.tif' in their respective subfolders.
         """
         if not os.path.exists(self.dirname):
-            print(f"Error: The folder {self.dirname} does not exist.")
+            _log.warning("The folder %s does not exist.", self.dirname)
             return
 
-        # Iterate through files in the directory
-        for file_name in os.listdir(self.dirname):
-            if file_name.lower().endswith(".tif"):
-                parts = file_name.rsplit("_", 1)
-                if len(parts) < 2:
-                    print(
-                        f"Skipping file with unexpected format: {file_name}")
+        # Group the files to move by subfolder, as (file name, new name)
+        moves = defaultdict(list)
+        with os.scandir(self.dirname) as entries:
+            for entry in entries:
+                file_name = entry.name
+                lower_name = file_name.lower()
+                if lower_name.endswith(".tif"):
+                    new_name = "data.tif"
+                elif lower_name.endswith(".001"):
+                    new_name = file_name
+                else:
                     continue
 
-                # Use the last part (before extension) as the subfolder name
-                subfolder_name = parts[-1].split(".")[0]
-                subfolder_path = os.path.join(self.dirname, subfolder_name)
-
-                # Create the subfolder if it does not exist
-                os.makedirs(subfolder_path, exist_ok=True)
-
-                # Move and rename the file
-                source_path = os.path.join(self.dirname, file_name)
-                destination_path = os.path.join(subfolder_path, "data.tif")
-                shutil.move(source_path, destination_path)
-
-                print(
-                    f"Moved and renamed: {file_name} -> {destination_path}")
-            
-            if file_name.lower().endswith(".001"):
                 parts = file_name.rsplit("_", 1)
                 if len(parts) < 2:
-                    print(
-                        f"Skipping file with unexpected format: {file_name}")
+                    _log.debug("Skipping file with unexpected format: %s",
+                               file_name)
                     continue
 
                 # Use the last part (before extension) as the subfolder name
                 subfolder_name = parts[-1].split(".")[0]
-                subfolder_path = os.path.join(self.dirname, subfolder_name)
+                moves[subfolder_name].append((file_name, new_name))
+
+        for subfolder_name, files in moves.items():
+            subfolder_path = os.path.join(self.dirname, subfolder_name)
 
-                # Create the subfolder if it does not exist
-                os.makedirs(subfolder_path, exist_ok=True)
+            # Create the subfolder once for all its files
+            os.makedirs(subfolder_path, exist_ok=True)
 
-                # Move and rename the file
+            for file_name, new_name in files:
+                # Move and rename the file, the subfolder is on the same
+                # file system so a plain rename is enough
                 source_path = os.path.join(self.dirname, file_name)
-                destination_path = os.path.join(subfolder_path, file_name)
-                shutil.move(source_path, destination_path)
+                destination_path = os.path.join(subfolder_path, new_name)
+                os.replace(source_path, destination_path)
+                _log.debug("Moved and renamed: %s -> %s",
+                           file_name, destination_path)
 
-                print(
-                    f"Moved and renamed: {file_name} -> {destination_path}")
+        _log.info("Moved %d files into %d folders",
+                  sum(len(files) for files in moves.values()), len(moves))
 
     def rename_wo_legend_all(self):
         """
@@ -422,69 +625,66 @@ class Process:
                 if file.endswith(".001"):
                     folder_names.append(subdir)
 
-        print(folder_names)  # debug print
-
+        renamed = 0
         # Process each folder found
         for folder in folder_names:
+            # The recipe is parsed on the first TIFF, once per folder
+            coords = None
             for subdir, _, files in os.walk(folder):
                 for file in files:
-                    if file.endswith(".tiff"):
-                        print(subdir)
-                        print(f"Processing: {file}")
-                        old_filepath = os.path.join(subdir, file)
-
-                        matching_files = glob.glob(os.path.join(folder, '*.001'))
-                        print("Found .001 files:", matching_files)  # debug print
-
-                        if matching_files:
-                            recipe_path = matching_files[0]
-                            self.coordinates = self.extract_positions(recipe_path)
-                        else:
-                            return
-                        
-
-                        print(self.coordinates)
+                    if not file.endswith(".tiff"):
+                        continue
+                    old_filepath = os.path.join(subdir, file)
 
-                        try:
-                            defect_part = int(file.split("_")[1]) - 1
-                            print(f"Defect part index: {defect_part}")
-                        except (IndexError, ValueError):
-                            print(
-                                f"Skipping file due to unexpected format: {file}")
+                    # Suffix based on the file type
+                    if CLASS_INTERNAL in file:
+                        suffix = "_BSE.tif"
+                    else:
+                        topo_index = file.find(CLASS_TOPO)
+                        if topo_index == -1:
+                            _log.debug("Skipping file due to unexpected "
+                                       "format: %s", file)
                             continue
+                        # Topography number, right after the class name
+                        topo_number = file[topo_index + len(CLASS_TOPO)]
+                        suffix = f"_SE{topo_number}.tiff"
+
+                    if coords is None:
+                        matching_files = glob.glob(
+                            os.path.join(folder, '*.001'))
+                        if not matching_files:
+                            _log.warning("No recipe file found in: %s",
+                                         folder)
+                            return
+                        self.coordinates = self.extract_positions(
+                            matching_files[0])
+                        coords = self.coordinates.to_numpy()
 
-                        # Check if defect part is within the valid range
-
+                    try:
+                        defect_part = int(file.split("_")[1]) - 1
+                    except (IndexError, ValueError):
+                        _log.debug("Skipping file due to unexpected "
+                                   "format: %s", file)
+                        continue
 
-                        # Get X and Y coordinates
-                    
+                    # Check if defect part is within the valid range
+                    if defect_part >= len(coords):
+                        _log.debug("Skipping file %s due to out-of-bounds "
+                                   "defect part.", file)
+                        continue
 
-                        if defect_part >= len(self.coordinates):
-                            print(
-                                f"Skipping file {file} due to out-of-bounds "
-                                f"defect part.")
-                            continue
+                    # Get X and Y coordinates
+                    x, y = coords[defect_part]
+                    new_filename = f"{x}_{y}{suffix}"
 
-                        x = self.coordinates.iloc[defect_part, 0]
-                        y = self.coordinates.iloc[defect_part, 1]
-                        new_filename = f"{x}_{y}"
-
-                        # Add specific suffix based on the file type
-                        if "_Class_1_Internal" in file:
-                            new_filename += "_BSE.tif"
-                        elif "_Class_1_Topography" in file:
-                            topo_number = file.split("_Class_1_Topography")[1][
-                                0]  # Extract Topography number
-                            new_filename += f"_SE{topo_number}.tiff"
-                        else:
-                            print(
-                                f"Skipping file due to unexpected format: {file}")
-                            continue
+                    # Construct the new file path and rename
+                    new_filepath = os.path.join(subdir, new_filename)
+                    os.rename(old_filepath, new_filepath)
+                    renamed += 1
+                    _log.debug("Renamed: %s -> %s", old_filepath, new_filepath)
 
-                        # Construct the new file path and rename
-                        new_filepath = os.path.join(subdir, new_filename)
-                        os.rename(old_filepath, new_filepath)
-                        print(f"Renamed: {old_filepath} -> {new_filepath}")
+        _log.info("Renamed %d files in %d folders",
+                  renamed, len(folder_names))
 
     def rename_wo_legend(self):
         """
@@ -494,70 +694,74 @@ class Process:
         """
         wafer_path = os.path.join(self.dirname, self.wafer_number)
         if not os.path.exists(wafer_path):
-            print(f"Error: The wafer folder {wafer_path} does not exist.")
+            _log.warning("The wafer folder %s does not exist.", wafer_path)
             return
 
+        # The recipe is parsed on the first valid TIFF only
+        coords = None
+        renamed = 0
         for subdir, _, files in os.walk(wafer_path):
             for file in files:
-                if file.endswith(".tiff"):
-                    print(f"Processing: {file}")
-
-                    old_filepath = os.path.join(subdir, file)
+                if not file.endswith(".tiff"):
+                    continue
+                old_filepath = os.path.join(subdir, file)
 
-                    try:
-                        defect_part = int(file.split("_")[1]) - 1
-                        print(f"Defect part index: {defect_part}")
-                    except (IndexError, ValueError):
-                        print(
-                            f"Skipping file due to unexpected format: {file}")
+                # Suffix based on the file type
+                if CLASS_INTERNAL in file:
+                    suffix = "_BSE.tiff"
+                else:
+                    topo_index = file.find(CLASS_TOPO)
+                    if topo_index == -1:
+                        _log.debug("Skipping file due to unexpected format: %s",
+                                   file)
                         continue
-                    
-                    matching_files = glob.glob(os.path.join(wafer_path, '*.001'))
+                    # Topography number, right after the class name
+                    topo_number = file[topo_index + len(CLASS_TOPO)]
+                    suffix = f"_SE{topo_number}.tiff"
 
-                    print("Found .001 files:", matching_files)  # debug print
+                try:
+                    defect_part = int(file.split("_")[1]) - 1
+                except (IndexError, ValueError):
+                    _log.debug("Skipping file due to unexpected format: %s",
+                               file)
+                    continue
 
-                    if matching_files:
-                        recipe_path = matching_files[0]
-                    else:
+                if coords is None:
+                    matching_files = glob.glob(
+                        os.path.join(wafer_path, '*.001'))
+                    if not matching_files:
+                        _log.warning("No recipe file found in: %s", wafer_path)
                         return
-                    self.coordinates = self.extract_positions(recipe_path)
-                    
-                    # Check if defect part is within the valid range
-                    if defect_part >= len(self.coordinates):
-                        print(
-                            f"Skipping file {file} "
-                            f"due to out-of-bounds defect part.")
-                        continue
+                    self.coordinates = self.extract_positions(
+                        matching_files[0])
+                    coords = self.coordinates.to_numpy()  # X, Y columns
+
+                # Check if defect part is within the valid range
+                if defect_part >= len(coords):
+                    _log.debug("Skipping file %s due to out-of-bounds "
+                               "defect part.", file)
+                    continue
 
-                    x = self.coordinates.iloc[defect_part, 0]
-                    y = self.coordinates.iloc[defect_part, 1]
-                    new_filename = f"{x}_{y}"
-
-                    # Add specific suffix based on the file type
-                    if "_Class_1_Internal" in file:
-                        new_filename += "_BSE.tiff"
-                    elif "_Class_1_Topography" in file:
-                        topo_number = file.split("_Class_1_Topography")[1][
-                            0]  # Extract Topography number
-                        new_filename += f"_SE{topo_number}.tiff"
-                    else:
-                        print(
-                            f"Skipping file due to unexpected format: {file}")
-                        continue
+                x, y = coords[defect_part]
+                new_filename = f"{x}_{y}{suffix}"
 
-                    # Construct the new file path and rename
-                    new_filepath = os.path.join(subdir, new_filename)
-                    os.rename(old_filepath, new_filepath)
-                    print(f"Renamed: {old_filepath} -> {new_filepath}")
+                # Construct the new file path and rename
+                new_filepath = os.path.join(subdir, new_filename)
+                os.rename(old_filepath, new_filepath)
+                renamed += 1
+                _log.debug("Renamed: %s -> %s", old_filepath, new_filepath)
+
+        _log.info("Renamed %d files in %s", renamed, wafer_path)
 
     def clean_folders_and_files(self):
         """
         Clean up folders and files by deleting specific TIFF files
         """
-        for folder, subfolders, files in os.walk(self.dirname):           
+        renamed = deleted = 0
+        for folder, subfolders, files in os.walk(self.dirname):
             # Rename folders like "w01" -> "1"
-            for subfolder in subfolders:
-                match = re.fullmatch(r"w0*(\d+)", subfolder)
+            for index, subfolder in enumerate(subfolders):
+                match = _RE_WAFER.fullmatch(subfolder)
                 if match:
                     new_name = match.group(1)
                     old_path = os.path.join(folder, subfolder)
@@ -566,18 +770,24 @@ class Process:
                     # Avoid name conflicts
                     if not os.path.exists(new_path):
                         os.rename(old_path, new_path)
-                        print(f"Renamed: {old_path} -> {new_path}")
+                        # The walk goes on in the renamed folder
+                        subfolders[index] = new_name
+                        renamed += 1
+                        _log.debug("Renamed: %s -> %s", old_path, new_path)
                     else:
-                        print(f"Conflict: {new_path} already exists. Skipped renaming.")
-    
-        for folder, subfolders, files in os.walk(self.dirname):
+                        _log.warning("Conflict: %s already exists. "
+                                     "Skipped renaming.", new_path)
+
             # Delete .tiff files that contain "Raw" in their name
             for file in files:
                 if file.endswith(".tiff") and "Raw" in file:
-                    print(file)
                     file_path = os.path.join(folder, file)
                     os.remove(file_path)
-                    print(f"Deleted: {file_path}")
+                    deleted += 1
+                    _log.debug("Deleted: %s", file_path)
+
+        _log.info("Renamed %d folders and deleted %d files in %s",
+                  renamed, deleted, self.dirname)
 
 if __name__ == "__main__":
     DIRNAME = r"C:\Users\TM273821\Desktop\SEM\RAW"
@@ -5,16 +5,17 @@ This module implements the main window and core functionality
 for the SEM data visualization application.
 """
 
+import logging
 import sys
 from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication, QWidget, QGridLayout
 from semapp.Layout.main_window_att import LayoutFrame
+from semapp.Layout.styles import GLOBAL_STYLE
 from semapp.Layout.create_button import ButtonFrame
 from semapp.Plot.frame_attributes import PlotFrame
 
 # Constants
 TIMER_INTERVAL = 200  # Milliseconds
-BACKGROUND_COLOR = "#F5F5F5"
 
 
 class MainWindow(QWidget):  # pylint: disable=R0903
@@ -53,7 +54,9 @@ class MainWindow(QWidget):  # pylint: disable=R0903
         and initializes the update timer.
         """
         self.setWindowTitle("Data Visualization")
-        self.setStyleSheet(f"background-color: {BACKGROUND_COLOR};")
+        # Single style sheet for the whole application, parsed once
+        self.setObjectName("main")
+        QApplication.instance().setStyleSheet(GLOBAL_STYLE)
 
         # Create the main layout (canvas_layout)
         self.canvas_widget = QWidget(self)
@@ -76,6 +79,8 @@ class MainWindow(QWidget):  # pylint: disable=R0903
 
 
 def main():
+    # Per-file details of the processing are logged at DEBUG level
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("SEMapp launched")
     app = QApplication(sys.argv)
     window = MainWindow()